@@ -17,6 +17,12 @@ from .mp_property import (Property,
 # Functions
 from .anacronisms import group_hack
 
+from .diagnostics import (diagnose,
+                          enable_diagnostics,
+                          reset_diagnostics,
+                          diagnostics_summary,
+                          collect_diagnostics)
+
 from .loader import (setup_ontology,
                      load_ontology)
 from .ontology import (meta_fix,
@@ -2,11 +2,14 @@
 # Things which are "wrong" in some sense, and for which hacks are necessary.
 # The goal is to remove the need for any of these.
 
+from .diagnostics import diagnose
+
+
 def group_hack(klass_name):
     """ Handles the pyesdoc method of dealing with the
     issue outlined in https://github.com/ES-DOC/esdoc-cim-v2-schema/issues/30"""
     group_hack = klass_name.split(':')
     if len(group_hack) > 1:
-        print(f'Ignoring type hint in {klass_name}, for now')
+        diagnose('type hint ignored', group_hack[0], 'Ignoring type hint in %s, for now', klass_name)
         klass_name = group_hack[0]
     return klass_name
\ No newline at end of file
@@ -0,0 +1,65 @@
+# Diagnostics from the codecs and other high volume machinery. These are counted
+# (by event and class) and logged to the "pyosl" logger, but only when enabled,
+# so that there is no cost to them otherwise.
+
+import logging
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger('pyosl')
+
+
+class Diagnostics:
+    """ Holds the state of the diagnostics for the current run """
+
+    enabled = False
+    counts = Counter()
+
+
+def diagnose(event, klass=None, message=None, *args):
+    """ Record a diagnostic event, optionally associated with a class (or any other key),
+    and log the message (if present) at debug level. The message is a %-format string for
+    args, so it is only formatted when it is logged. Does nothing unless enabled. """
+    if Diagnostics.enabled:
+        Diagnostics.counts[(event, klass)] += 1
+        if message:
+            logger.debug(message, *args)
+
+
+def enable_diagnostics(enabled=True):
+    """ Turn diagnostics on (or off) """
+    Diagnostics.enabled = enabled
+
+
+def reset_diagnostics():
+    """ Forget all diagnostics counted so far """
+    Diagnostics.counts = Counter()
+
+
+def diagnostics_summary():
+    """ Return the counts of events so far, as a dictionary keyed by event,
+    of dictionaries of counts keyed by class"""
+    summary = {}
+    for (event, klass), n in sorted(Diagnostics.counts.items(), key=lambda x: (x[0][0], str(x[0][1]))):
+        summary.setdefault(event, {})[klass] = n
+    return summary
+
+
+@contextmanager
+def collect_diagnostics(log_summary=True):
+    """ Context manager which enables and resets diagnostics for the duration of the context,
+    and (optionally) logs a summary at info level at the end. Yields the summary dictionary,
+    which is filled in on exit. """
+    previous = Diagnostics.enabled
+    reset_diagnostics()
+    enable_diagnostics()
+    summary = {}
+    try:
+        yield summary
+    finally:
+        Diagnostics.enabled = previous
+        summary.update(diagnostics_summary())
+        if log_summary:
+            for event, counts in summary.items():
+                logger.info(f'{event}: {sum(counts.values())} ' +
+                            ', '.join([f'{k}={n}' for k, n in counts.items()]))
@@ -8,6 +8,9 @@ class PropertyDescriptor:
     # https://stackoverflow.com/questions/44548995/how-to-add-and-bind-descriptors-dynamically-in-python
     # https://nbviewer.jupyter.org/urls/gist.github.com/ChrisBeaumont/5758381/raw/descriptor_writeup.ipynb
 
+    # Callables, observer(instance, label), told whenever any property is set or deleted.
+    observers = []
+
     def __init__(self, definition):
         """
         Initialise with the property definition, and create a label so we can ensure we use the instance dictionary
@@ -22,6 +25,8 @@ class PropertyDescriptor:
         """
         p = self.__myget(instance)
         p.value = value
+        for observer in PropertyDescriptor.observers:
+            observer(instance, self.label)
 
     def __get__(self, instance, owner):
         """
@@ -44,6 +49,15 @@ class PropertyDescriptor:
 
     def __delete__(self, instance):
         del instance.__dict__[self.label]
+        for observer in PropertyDescriptor.observers:
+            observer(instance, self.label)
+
+    def defer(self, instance, content, decoder):
+        """
+        Hold undecoded content for the instance property, which will be decoded and
+        validated when first accessed.
+        """
+        self.__myget(instance).defer(content, decoder)
 
 
 class PropertyList (list):
@@ -92,6 +106,7 @@ class Property:
         else:
             self.__value = PropertyList(self._target, [])
         self._initialised = False
+        self._pending = None
 
     def __set(self, value):
         """ This is the setter method"""
@@ -106,22 +121,32 @@ class Property:
                 raise ValueError('Attempt to set single value to list type')
             # check types of list members
             self.__value = PropertyList(self._target, value)
+            self._pending = None
 
         else:
             # is it the right kind of thing?
             if Property.validator(value, self._target):
                 self.__value = value
+                self._pending = None
             else:
                 raise ValueError('Attempt to set inconsistent type {} on property {} (expected {})'.format(type(value), self._name, self._target))
 
     def __get(self):
         """ This is the getter method """
+        if self._pending:
+            content, decoder = self._pending
+            self.__set(decoder(content))
         return self.__value
 
+    def defer(self, content, decoder):
+        """ Hold undecoded content, which will be decoded (using decoder)
+        and validated on first access."""
+        self._pending = (content, decoder)
+
     def append(self, value):
         """ Need to deal with append for list types """
         if Property.validator(value, self._target):
-            self.__value.append(value)
+            self.__get().append(value)
         else:
             raise ValueError('Attempt to add inconsistent type to list in property')
 
@@ -143,6 +168,7 @@ class Property:
         return self._doc
 
     def __delete__(self):
+        self._pending = None
         self.__value = None
 
     def __ne__(self, other):
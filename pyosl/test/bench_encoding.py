@@ -0,0 +1,45 @@
+import timeit
+import unittest
+
+from pyosl import Factory
+from pyosl.tools import Triples
+from pyosl.tools.osl_encoder import _encode as _osl_encode
+from pyosl.tools.esd_encoder import _encode as _esd_encode
+from pyosl.test.fixtures import make_partition
+
+
+class _Forgetful(dict):
+    """ A memo which never remembers anything, so shared content is encoded every time it occurs"""
+
+    def __setitem__(self, key, value):
+        pass
+
+
+class BenchEncoding(unittest.TestCase):
+    """ Compare encoding a heavily shared graph with and without the encoding memo"""
+
+    number = 5
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.shared = make_partition()
+
+    def _compare(self, label, function):
+        memo = timeit.timeit(lambda: function(self.shared, {}), number=self.number)
+        no_memo = timeit.timeit(lambda: function(self.shared, _Forgetful()), number=self.number)
+        print(f'\n{label}: memo {memo/self.number:.4f}s, no memo {no_memo/self.number:.4f}s per call')
+
+    def bench_osl_encode(self):
+        self._compare('osl_encode', lambda x, memo: _osl_encode(x, False, None, memo, {}))
+
+    def bench_esd_encode(self):
+        self._compare('esd_encode', lambda x, memo: _esd_encode(x, memo, {}))
+
+    def bench_triples(self):
+        self._compare('Triples.add_instance', lambda x, memo: Triples()._add_instance(x, memo, None))
+
+
+if __name__ == "__main__":
+    loader = unittest.TestLoader()
+    loader.testMethodPrefix = "bench"
+    unittest.main(testLoader=loader)
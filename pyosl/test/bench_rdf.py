@@ -0,0 +1,98 @@
+import timeit
+import unittest
+
+from rdflib import URIRef
+
+from pyosl import Factory
+from pyosl.tools import Triples, Triples2
+from pyosl.test.fixtures import make_partition
+
+
+def make_triples(n):
+    """ n triples about n/10 subjects, with every tenth triple a duplicate """
+    triples = []
+    for i in range(n):
+        j = i - 1 if i % 10 == 9 else i
+        triples.append((f'http://esdoc-org/osl/shared.party/{j // 10}', f'property_{j % 10}',
+                        f'{j}^^http://www.w3.org/2001/XMLSchema#integer'))
+    return triples
+
+
+class ListTriples(Triples):
+    """ Triples as they used to be, de-duplicated by searching the list """
+
+    def add_triple(self, triple):
+        if triple not in self.triples:
+            self.triples.append(triple)
+
+
+class BenchTriples(unittest.TestCase):
+    """ Show that adding triples scales linearly """
+
+    def setUp(self):
+        Factory.reset_descriptor()
+
+    def _add(self, klass, triples):
+        g = klass()
+        for t in triples:
+            g.add_triple(t)
+        return g
+
+    def bench_scaling(self):
+        print()
+        for n in (10**4, 10**5, 10**6, 3 * 10**6):
+            triples = make_triples(n)
+            elapsed = timeit.timeit(lambda: self._add(Triples, triples), number=1)
+            print(f'Triples: {n} triples in {elapsed:.3f}s, {1e9 * elapsed / n:.0f}ns per triple')
+
+    def bench_list(self):
+        print()
+        for n in (10**3, 10**4):
+            triples = make_triples(n)
+            elapsed = timeit.timeit(lambda: self._add(ListTriples, triples), number=1)
+            print(f'List de-duplication: {n} triples in {elapsed:.3f}s, {1e9 * elapsed / n:.0f}ns per triple')
+
+
+class FreshTables:
+    """ Builds the RDF terms afresh every time, as Triples2 used to """
+
+    def __init__(self, type_space):
+        self.type_space = type_space
+
+    def klass(self, klass):
+        return URIRef(self.type_space + klass)
+
+    def predicate(self, klass, key):
+        return URIRef(self.type_space + klass + '/' + key)
+
+
+class BenchExport(unittest.TestCase):
+    """ Compare RDF export with and without the interned URIRef tables """
+
+    number = 3
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.partition = make_partition(1000, shared=False)
+
+    def _export(self, fresh):
+        g = Triples2(collect_semantic_triples=False)
+        if fresh:
+            g.tables = FreshTables(g.type_space)
+        g.add_instance(self.partition)
+        return g
+
+    def bench_export(self):
+        print()
+        for label, fresh in [('interned', False), ('fresh', True)]:
+            elapsed = timeit.timeit(lambda: self._export(fresh), number=self.number) / self.number
+            g = self._export(fresh)
+            refs = {id(t) for triple in g.g for t in triple if isinstance(t, URIRef)}
+            print(f'Triples2 ({label} terms): {len(g.g)} triples in {elapsed:.3f}s, '
+                  f'with {len(refs)} distinct URIRef objects')
+
+
+if __name__ == "__main__":
+    loader = unittest.TestLoader()
+    loader.testMethodPrefix = "bench"
+    unittest.main(testLoader=loader)
@@ -0,0 +1,85 @@
+# Documents shared by the tests and benchmarks
+
+from pyosl import Factory
+from pyosl.tools import named_build, numeric_value, online
+
+
+def make_machines():
+    """ Two machines and their partitions sharing vendor and author documents"""
+    author = Factory.new_document('shared.party')
+    author.name = 'Bryan Lawrence'
+    cray = Factory.new_document('shared.party', author)
+    cray.name = 'Cray'
+    cray.url = online('https://cray.com', 'Website')
+    machines = []
+    for name in ['Archer', 'Archer2']:
+        machine = Factory.new_document('platform.machine', author)
+        machine.name = name
+        machine.vendor = cray
+        work = named_build('platform.storage_pool', 'Work')
+        work.vendor = cray
+        machine.storage_pools = [work]
+        machines.append(machine)
+    return machines
+
+
+def make_machine():
+    """ A small document with nested content, enums and lists"""
+    author = Factory.new_document('shared.party')
+    author.name = 'Bryan Lawrence'
+    author.url = online('http://www.bnlawrence.net', 'personal website')
+    machine = Factory.new_document('platform.machine', author)
+    machine.name = 'Archer'
+    pool = named_build('platform.compute_pool', 'Normal Nodes')
+    pool.number_of_nodes = 4544
+    pool.memory_per_node = numeric_value(64., 'GB')
+    work = named_build('platform.storage_pool', 'Work')
+    work.type = 'Lustre'
+    work.file_system_sizes = [numeric_value(1.4, 'PB'), numeric_value(1.6, 'PB')]
+    machine.compute_pools = [pool]
+    machine.storage_pools = [work]
+    return machine
+
+
+def make_partition(n=200, shared=True):
+    """ A partition with many compute pools, all of which share the same (hand-built)
+    numeric values and network card, with a vendor party and online resource, as is
+    common in our documents. If not shared, each pool gets its own copies instead."""
+
+    def vendor():
+        party = Factory.new_document('shared.party')
+        party.name = 'Cray'
+        party.url = online('https://www.cray.com', 'vendor website')
+        return party
+
+    def nic(party):
+        card = Factory.build('platform.nic')
+        card.name = 'Aries'
+        card.vendor = party
+        return card
+
+    def numeric(value, units):
+        number = Factory.build('shared.numeric')
+        number.value, number.units = value, units
+        return number
+
+    the_vendor = vendor()
+    the_nic, memory, clock = nic(the_vendor), numeric(64.0, 'GB'), numeric(2.7, 'GHz')
+
+    partition = Factory.build('platform.partition')
+    partition.name = 'Compute'
+    partition.vendor = the_vendor
+    partition.online_documentation = [the_vendor.url, ]
+    pools = []
+    for i in range(n):
+        pool = Factory.build('platform.compute_pool')
+        pool.name = f'Pool {i}'
+        if shared:
+            pool.memory_per_node, pool.clock_speed = memory, clock
+            pool.network_cards_per_node = [the_nic, ]
+        else:
+            pool.memory_per_node, pool.clock_speed = numeric(64.0, 'GB'), numeric(2.7, 'GHz')
+            pool.network_cards_per_node = [nic(vendor()), ]
+        pools.append(pool)
+    partition.compute_pools = pools
+    return partition
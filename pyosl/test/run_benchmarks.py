@@ -0,0 +1,28 @@
+import datetime
+import os
+import unittest
+
+# Build the benchmark suite from the benchmarks found in the bench files.
+# These are not tests (they assert nothing), so they are kept out of the main
+# test suite, and are discovered by method prefix rather than test_.
+
+loader = unittest.TestLoader()
+loader.testMethodPrefix = 'bench'
+benchmarks = unittest.TestSuite()
+benchmarks.addTests(loader.discover('.', pattern='bench_*.py'))
+
+def run_benchmarks(verbosity=2):
+    ''' Runs the benchmarks'''
+    runner = unittest.TextTestRunner(verbosity=verbosity)
+    runner.run(benchmarks)
+
+if __name__ == '__main__':
+    print('---------------')
+    print('PYOSL BENCHMARKS')
+    print('---------------')
+    print('Run date:', datetime.datetime.now())
+    print('')
+    print('Running benchmarks from', os.path.abspath(os.curdir))
+    print('')
+
+    run_benchmarks()
@@ -1,8 +1,12 @@
 import unittest
+import tempfile
+import os
+from rdflib import Graph
+from rdflib.compare import isomorphic
 from pyosl import Factory
 from pyosl.tools import named_build, calendar_period, osl_fill_from, online, numeric_value, get_reference_for, \
     new_document
-from pyosl.tools import osl_encode2json, bundle_instance, Triples, Triples2
+from pyosl.tools import osl_encode2json, bundle_instance, Triples, Triples2, StreamingTriples
 from pyosl.uml import TriplesDelux
 
 import networkx as nx
@@ -332,6 +336,16 @@ class TestTriples(unittest.TestCase):
         for i,j in zip(g.triples[0],
                        ('http://esdoc-org/osl/platform.machine/Archer', 'rdf:type', 'platform.machine')):
             self.assertEqual(i,j)
+
+    def test_triples_deduplicated(self):
+        g = Triples()
+        g.add_instance(self.a)
+        triples = list(g.triples)
+        for triple in reversed(triples):
+            g.add_triple(triple)
+        self.assertEqual(g.triples, triples)
+        self.assertEqual(len(set(triples)), len(triples))
+
 #TODO: Why is the name of the first triple wrong?
 #TODO: Check that the doc_meta_infos (and everything else) are linked right.
 #TODO: Proper triple serialisation using something we can input to a visualisation package (or do my own).
@@ -347,6 +361,54 @@ class TestTriples(unittest.TestCase):
         ts.add_instance(self.a)
         ts.g.serialize(destination='turtle.txt', format='turtle')
 
+    def test_streaming(self):
+        """ Test streaming gives the same triples as the rdflib graph"""
+        ts = Triples2()
+        ts.add_instance(self.a)
+        with tempfile.TemporaryDirectory() as tmp:
+            for rdf_format in StreamingTriples.FORMATS:
+                filename = os.path.join(tmp, f'archer.{rdf_format}')
+                with StreamingTriples(filename, rdf_format) as stream:
+                    stream.add_instance(self.a)
+                streamed = Graph().parse(filename, format=rdf_format)
+                self.assertEqual(len(streamed), len(ts.g))
+                self.assertTrue(isomorphic(streamed, ts.g))
+
+    def test_streaming_literals(self):
+        """ Test literals which need escaping are streamed intact"""
+        name = 'Archer "2"\nwith a \\ and a\r'
+        self.a.name = name
+        with tempfile.TemporaryDirectory() as tmp:
+            for rdf_format in StreamingTriples.FORMATS:
+                filename = os.path.join(tmp, f'archer.{rdf_format}')
+                with StreamingTriples(filename, rdf_format) as stream:
+                    stream.add_instance(self.a)
+                streamed = Graph().parse(filename, format=rdf_format)
+                self.assertIn(name, [str(o) for o in streamed.objects()])
+
+    def test_deterministic(self):
+        """ Test deterministic blank nodes make exports repeatable"""
+        first, second = Triples(deterministic=True), Triples(deterministic=True)
+        first.add_instance(self.a)
+        second.add_instance(self.a)
+        self.assertEqual(first.triples, second.triples)
+        second.add_instance(self.a)
+        self.assertEqual(first.triples, second.triples)
+        random = Triples()
+        random.add_instance(self.a)
+        self.assertNotEqual(first.triples, random.triples)
+        first, second = Triples2(deterministic=True), Triples2(deterministic=True)
+        first.add_instance(self.a)
+        second.add_instance(self.a)
+        self.assertEqual(set(first.g), set(second.g))
+        # (an instance with no name is named from its content)
+        pool = self.a.compute_pools[0]
+        first, second = Triples2(deterministic=True), Triples2()
+        first.add_instance(pool)
+        second.add_instance(pool)
+        first.add_instance(pool)
+        self.assertEqual(len(first.g), len(second.g))
+
     def test_semantic_triples(self):
         viewer = Viewer(self.a)
         viewer.view_nx()
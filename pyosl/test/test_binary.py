@@ -0,0 +1,53 @@
+import unittest
+from pathlib import Path
+import json
+
+from pyosl import Factory
+from pyosl.tools import esd_decode, osl_encode, osl_encode2json
+from pyosl.tools import osl_pack, osl_unpack, osl_encode2binary, osl_decode_binary
+from pyosl.tools import ontology_tables
+from pyosl.test.fixtures import make_machine
+
+
+class TestBinary(unittest.TestCase):
+    """ Tests the compact binary codec"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.instances = Path.cwd().glob('test_input/*')
+
+    def test_values(self):
+        """ Test values which are not osl content round trip"""
+        for v in [None, True, False, 0, -1, 2**70, -2**70, 1.5, '', 'abc', ['a', 'a', 1], {'x': [1, 'x']}]:
+            self.assertEqual(osl_unpack(osl_pack(v)), v)
+
+    def test_pack_roundtrip(self):
+        """ Test encoded content is exactly the same after packing and unpacking"""
+        content, bundle = osl_encode(make_machine())
+        self.assertEqual(osl_unpack(osl_pack(content)), content)
+
+    def test_instance_roundtrip(self):
+        machine = make_machine()
+        binary = osl_encode2binary(machine)
+        self.assertEqual(osl_decode_binary(Factory, binary), machine)
+        self.assertLess(len(binary), len(osl_encode2json(machine)) / 2)
+
+    def test_esd_roundtrip(self):
+        for x in self.instances:
+            with x.open() as f:
+                python_version = esd_decode(Factory, json.load(f))
+                new_python_version = osl_decode_binary(Factory, osl_encode2binary(python_version))
+                assert python_version == new_python_version
+
+    def test_stable_identifiers(self):
+        """ Test identifiers are sorted (and hence stable) and fingerprinted"""
+        tables = ontology_tables(Factory.ontology)
+        self.assertEqual(tables.klasses, sorted(tables.klasses))
+        binary = bytearray(osl_encode2binary(make_machine()))
+        binary[5] ^= 0xff
+        with self.assertRaises(ValueError):
+            osl_unpack(bytes(binary))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import tempfile
+import os
+
+from pyosl import Factory
+from pyosl.tools import bundle_instance
+from pyosl.tools import BundleWriter, BundleReader, write_bundle
+from pyosl.test.fixtures import make_machines
+
+
+class TestBundleArchive(unittest.TestCase):
+    """ Tests writing and reading bundle archives"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.machines = make_machines()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_bundle_instance_deduplicates(self):
+        docs = bundle_instance(self.machines[0])
+        self.assertEqual(len(docs), 3)
+
+    def test_roundtrip(self):
+        for archive, compression in [('tar', None), ('tar', 'gzip'), ('zip', 'lzma'), ('zip', 'gzip')]:
+            filename = os.path.join(self.tmp.name, f'bundle.{archive}')
+            manifest = write_bundle(filename, self.machines, archive, compression)
+            uids = [d['uid'] for d in manifest]
+            self.assertEqual(len(uids), 4)
+            self.assertEqual(len(set(uids)), 4)
+            with BundleReader(filename) as reader:
+                self.assertEqual(reader.roots, [m._meta.uid for m in self.machines])
+                self.assertEqual(len(list(reader)), 4)
+                for machine in self.machines:
+                    decoded = reader.decode(Factory, machine._meta.uid)
+                    self.assertEqual(decoded.name, machine.name)
+                    self.assertEqual(decoded.vendor.id, machine.vendor._meta.uid)
+
+    def test_incremental(self):
+        filename = os.path.join(self.tmp.name, 'bundle.tar')
+        with BundleWriter(filename) as writer:
+            self.assertEqual(writer.add(self.machines[0]), 3)
+            self.assertEqual(writer.add(self.machines[1]), 1)
+            self.assertEqual(writer.add(self.machines[1]), 0)
+        with BundleReader(filename) as reader:
+            self.assertEqual(reader.roots, [m._meta.uid for m in self.machines])
+        with self.assertRaises(ValueError):
+            BundleWriter(filename, archive='rar')
+
+
+if __name__ == "__main__":
+    unittest.main()
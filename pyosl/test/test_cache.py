@@ -0,0 +1,54 @@
+import unittest
+
+from pyosl import Factory, PropertyDescriptor
+from pyosl.tools import EncodingCache, osl_encode2json, bundle_instance, online
+
+
+class TestEncodingCache(unittest.TestCase):
+    """ Tests caching of encoded documents"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.author = Factory.new_document('shared.party')
+        self.author.name = 'Bryan'
+        self.author.url = online('http://www.bnlawrence.net', 'personal website')
+        self.project = Factory.new_document('designing.project', self.author)
+        self.project.name = 'My Big Fat Experiment'
+        self.cache = EncodingCache(maxsize=4)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_hits(self):
+        first = osl_encode2json(self.project, cache=self.cache)
+        self.assertEqual(first, osl_encode2json(self.project))
+        self.assertIs(osl_encode2json(self.project, cache=self.cache), first)
+        self.assertEqual(self.cache.cache.hits, 1)
+        self.assertEqual(bundle_instance(self.project, cache=self.cache), bundle_instance(self.project))
+        self.assertEqual(osl_encode2json(self.project, canonical=True, cache=self.cache),
+                         osl_encode2json(self.project, canonical=True))
+        self.cache.encode(self.project, 'esd_json')
+        self.assertEqual(len(self.cache), 4)
+        self.cache.encode(self.author)
+        self.assertEqual(len(self.cache), 4)
+        with self.assertRaises(ValueError):
+            self.cache.encode(self.project, 'xml')
+
+    def test_invalidation(self):
+        first = osl_encode2json(self.project, cache=self.cache)
+        self.author.url.linkage = 'https://www.bnlawrence.net'
+        self.assertEqual(len(self.cache), 0)
+        second = osl_encode2json(self.project, cache=self.cache)
+        self.assertNotEqual(first, second)
+        self.project._meta.version = 2
+        self.assertEqual(len(self.cache), 0)
+        osl_encode2json(self.project, cache=self.cache)
+        self.cache.invalidate(self.project._meta.uid)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.owners, {})
+        self.cache.close()
+        self.assertNotIn(self.cache._modified, PropertyDescriptor.observers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import tempfile
+import mmap
+import os
+import json
+
+from pyosl import Factory
+from pyosl.tools import CorpusWriter, CorpusReader, write_corpus, osl_encode
+from pyosl.tools import osl_encode2json, osl_decode_json, esd_encode, esd_transcode_json
+
+
+def make_parties(n):
+    parties = []
+    for i in range(n):
+        party = Factory.new_document('shared.party')
+        party.name = f'Party {i}'
+        parties.append(party)
+    return parties
+
+
+class TestCorpus(unittest.TestCase):
+    """ Tests writing and reading json lines corpora"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, 'corpus.jsonl')
+        self.parties = make_parties(10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        uids = write_corpus(self.filename, self.parties)
+        project = Factory.new_document('designing.project')
+        project.name = 'Project'
+        with CorpusWriter(self.filename) as writer:
+            writer.add(osl_encode(project)[0])
+            with self.assertRaises(ValueError):
+                writer.add(Factory.build('shared.numeric'))
+        with CorpusReader(self.filename) as reader:
+            self.assertEqual(len(reader), 11)
+            for party, uid in zip(self.parties, uids):
+                self.assertEqual(reader.decode(Factory, uid), party)
+            self.assertEqual(reader.find('shared.party', 'Party 3'), [uids[3]])
+            self.assertEqual(reader.find('cim.2.designing.project'), [project._meta.uid])
+            self.assertEqual(len(list(reader.scan())), 11)
+            with self.assertRaises(KeyError):
+                reader.get('not-a-uid')
+
+    def test_index(self):
+        write_corpus(self.filename, self.parties)
+        self.parties[0].name = 'Renamed'
+        write_corpus(self.filename, self.parties[0:1])
+        os.remove(self.filename + '.idx')
+        with CorpusReader(self.filename) as reader:
+            # rebuilt, with the later version superseding the earlier one
+            self.assertEqual(len(reader), 10)
+            self.assertEqual(len(list(reader.scan())), 11)
+            self.assertEqual(reader.get(self.parties[0]._meta.uid)['name'], 'Renamed')
+
+
+    def test_buffers(self):
+        party = self.parties[0]
+        content = osl_encode2json(party).encode('utf-8')
+        self.assertEqual(osl_decode_json(Factory, content), party)
+        self.assertEqual(osl_decode_json(Factory, memoryview(b'[' + content + b']')[1:-1]), party)
+        with open(self.filename, 'wb') as f:
+            f.write(content)
+        with open(self.filename, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self.assertEqual(osl_decode_json(Factory, buffer), party)
+        esd_content = memoryview(json.dumps(esd_encode(party)).encode('utf-8'))
+        self.assertEqual(osl_decode_json(Factory, esd_transcode_json(esd_content)), party)
+
+
+if __name__ == "__main__":
+    unittest.main()
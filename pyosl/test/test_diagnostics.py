@@ -0,0 +1,53 @@
+import unittest
+from pathlib import Path
+import json
+
+from pyosl import Factory, group_hack
+from pyosl import collect_diagnostics, diagnostics_summary, reset_diagnostics
+from pyosl.diagnostics import diagnose
+from pyosl.tools import esd_decode, esd_encode
+
+
+class TestDiagnostics(unittest.TestCase):
+    """ Test diagnostics are quiet by default, and aggregated when collected"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        reset_diagnostics()
+        self.instances = list(Path.cwd().glob('test_input/*'))
+
+    def decode(self):
+        for x in self.instances:
+            with x.open() as f:
+                esd_encode(esd_decode(Factory, json.load(f)))
+        group_hack('shared.party:hint')
+
+    def test_quiet(self):
+        self.decode()
+        self.assertEqual(diagnostics_summary(), {})
+
+    def test_collected(self):
+        with self.assertLogs('pyosl', level='INFO') as logs:
+            with collect_diagnostics() as summary:
+                self.decode()
+        self.assertEqual(summary['type hint ignored'], {'shared.party': 1})
+        self.assertEqual(summary['esd decoded']['shared.responsibility'], len(self.instances))
+        self.assertIn('esd encoded', summary)
+        self.assertEqual(len(logs.output), len(summary))
+
+    def test_messages(self):
+        """ Messages are only formatted when diagnostics are collected """
+
+        class Unformattable:
+            def __str__(self):
+                raise AssertionError('formatted while diagnostics are off')
+
+        diagnose('quiet', 'x', 'Not formatted: %s', Unformattable())
+        with self.assertLogs('pyosl', level='DEBUG') as logs:
+            with collect_diagnostics(log_summary=False):
+                diagnose('loud', 'x', 'Formatted: %s', 42)
+        self.assertEqual(logs.records[0].getMessage(), 'Formatted: 42')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import tempfile
+import os
+
+from rdflib import URIRef, RDF
+
+from pyosl import Factory
+from pyosl.tools import Triples, Triples2, TripleIndex, SQLiteTriples, get_reference_for
+from pyosl.test.fixtures import make_machines
+
+
+class TestTripleIndex(unittest.TestCase):
+    """ Tests querying indexed triples"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.machines = make_machines()
+        self.cray = self.machines[0].vendor
+
+    def test_patterns(self):
+        exporter = Triples()
+        for machine in self.machines:
+            exporter.add_instance(machine)
+        index = TripleIndex(exporter)
+        self.assertEqual(len(index), len(exporter.triples))
+        self.assertEqual(sorted(index), sorted(exporter.triples))
+        for pattern in [(None, 'rdf:type', None), (None, None, 'platform.machine'),
+                        ('http://esdoc-org/osl/platform.machine/Archer', None, None)]:
+            expected = [t for t in exporter.triples if all(a is None or a == b for a, b in zip(pattern, t))]
+            self.assertEqual(sorted(index.triples(pattern)), sorted(expected))
+        triple = exporter.triples[0]
+        index.remove(triple)
+        self.assertNotIn(triple, index)
+        self.assertEqual(len(index), len(exporter.triples) - 1)
+
+    def test_join(self):
+        exporter = Triples2()
+        for machine in self.machines:
+            exporter.add_instance(machine)
+        index = TripleIndex(exporter)
+        cray = URIRef(exporter.resource_space + self.cray._meta.uid)
+        machine = URIRef(exporter.type_space + 'platform.machine')
+        results = index.query([('?doc', RDF.type, machine), ('?doc', '?p', cray)])
+        self.assertEqual({r['doc'] for r in results},
+                         {URIRef(exporter.resource_space + m._meta.uid) for m in self.machines})
+        # storage pools refer to cray too, but aren't machines
+        self.assertGreater(len(index.referencing(cray)), len(self.machines))
+        self.assertEqual(index.query([('?doc', RDF.type, URIRef('nothing'))]), [])
+        with self.assertRaises(ValueError):
+            index.query([('?doc', RDF.type)])
+
+
+class TestSQLiteTriples(unittest.TestCase):
+    """ Tests the SQLite triple store"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.machines = make_machines()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, 'triples.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persistence(self):
+        reference = get_reference_for(self.machines[0])
+        reference.relationship = 'predecessor'
+        self.machines[1].description = 'Successor'
+        expected = Triples(deterministic=True)
+        for machine in self.machines:
+            expected.add_instance(machine)
+        expected.add_instance(reference)
+        with SQLiteTriples(self.filename, batch_size=7, deterministic=True) as store:
+            store.add_instance(self.machines[0])
+            store.add_instance(reference)
+        with SQLiteTriples(self.filename, deterministic=True) as store:
+            store.add_instance(self.machines[1])
+            store.add_instance(self.machines[0])
+            self.assertEqual(len(store), len(expected.triples))
+            self.assertEqual(set(store), set(expected.triples))
+            self.assertIn(expected.triples[0], store)
+            pattern = (None, 'rdf:type', 'platform.machine')
+            self.assertEqual(len(list(store.triples(pattern))), 2)
+            self.assertEqual(store.external_esdoc_references,
+                             [(self.machines[0]._meta.uid, reference.name, 'predecessor')])
+            self.assertEqual(store.external_resources, ['https://cray.com'])
+            self.assertEqual(len(TripleIndex(store)), len(store))
+
+
+if __name__ == "__main__":
+    unittest.main()
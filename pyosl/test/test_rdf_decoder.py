@@ -0,0 +1,99 @@
+import unittest
+import tempfile
+import os
+
+from rdflib import RDF
+
+from pyosl import Factory
+from pyosl.tools import named_build
+from pyosl.tools import Triples, Triples2, StreamingTriples, RDFDecoder, rdf_decode
+from pyosl.test.fixtures import make_machines
+
+
+class TestRDFDecoder(unittest.TestCase):
+    """ Tests rebuilding instances from exported triples"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.machines = make_machines()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_triples(self):
+        exporter = Triples()
+        for machine in self.machines:
+            exporter.add_instance(machine)
+        decoder = RDFDecoder(Factory, exporter)
+        for machine in self.machines:
+            subject = [s for s in decoder.documents() if decoder.klass(s) == 'platform.machine'
+                       and decoder.decode(s).name == machine.name][0]
+            self.assertEqual(decoder.decode(subject), machine)
+        # shared documents are decoded once
+        first, second = [decoder.decode(s) for s in decoder.documents()
+                         if decoder.klass(s) == 'platform.machine']
+        self.assertIs(first.vendor, second.vendor)
+
+    def test_files(self):
+        for rdf_format in StreamingTriples.FORMATS:
+            filename = os.path.join(self.tmp.name, f'machines.{rdf_format}')
+            with StreamingTriples(filename, rdf_format) as stream:
+                for machine in self.machines:
+                    stream.add_instance(machine)
+            documents = {d._meta.uid: d for d in rdf_decode(Factory, filename, rdf_format)}
+            # (the author is only in the metadata, which isn't exported)
+            self.assertEqual(len(documents), 3)
+            for machine in self.machines:
+                decoded = documents[machine._meta.uid]
+                self.assertEqual(decoded.name, machine.name)
+                self.assertEqual(decoded.vendor.url.linkage, machine.vendor.url.linkage)
+                self.assertEqual(decoded.storage_pools[0].name, 'Work')
+                self.assertIs(decoded.vendor, documents[machine.vendor._meta.uid])
+
+    def test_graph(self):
+        exporter = Triples2()
+        exporter.add_instance(self.machines[0])
+        decoder = RDFDecoder(Factory, exporter)
+        with self.assertRaises(KeyError):
+            decoder.decode('not a subject')
+        machine = decoder.decode(exporter.resource_space + self.machines[0]._meta.uid)
+        self.assertEqual(machine.storage_pools[0].vendor.name, 'Cray')
+
+    def test_lists(self):
+        """ Lists keep their order, in either encoding, and whatever their length """
+        machine = self.machines[0]
+        names = [f'Pool{n}' for n in range(12)]
+        machine.storage_pools = [named_build('platform.storage_pool', n) for n in names]
+        for lists in Triples2.LISTS:
+            exporter = Triples2(lists=lists)
+            exporter.add_instance(machine)
+            decoder = RDFDecoder(Factory, exporter)
+            decoded = decoder.decode(exporter.resource_space + machine._meta.uid)
+            self.assertEqual([p.name for p in decoded.storage_pools], names)
+            # a single element list
+            exporter = Triples2(lists=lists)
+            exporter.add_instance(self.machines[1])
+            decoded = RDFDecoder(Factory, exporter).decode(exporter.resource_space + self.machines[1]._meta.uid)
+            self.assertEqual([p.name for p in decoded.storage_pools], ['Work'])
+        with self.assertRaises(ValueError):
+            Triples2(lists='bag')
+
+    def test_broken_lists(self):
+        """ Truncated and cyclic rdf:Lists are reported, not followed """
+        machine = self.machines[0]
+        machine.storage_pools = [named_build('platform.storage_pool', n) for n in ['Work', 'Home', 'Scratch']]
+        exporter = Triples2(lists='list')
+        exporter.add_instance(machine)
+        uri = exporter.resource_space + machine._meta.uid
+        last = [s for s, p, o in exporter.g if p == RDF.rest and o == RDF.nil][0]
+        truncated = [t for t in exporter.g if t[0] != last]
+        with self.assertRaisesRegex(ValueError, 'storage_pools .* is broken'):
+            RDFDecoder(Factory, truncated).decode(uri)
+        cyclic = [(s, p, last if o == RDF.nil else o) for s, p, o in exporter.g]
+        with self.assertRaisesRegex(ValueError, 'storage_pools .* loops'):
+            RDFDecoder(Factory, cyclic).decode(uri)
+
+
+if __name__ == "__main__":
+    unittest.main()
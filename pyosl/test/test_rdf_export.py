@@ -0,0 +1,138 @@
+import unittest
+import tempfile
+import os
+
+from rdflib import Literal, URIRef
+
+from pyosl import Factory
+from pyosl.tools import online, Triples2, StreamingTriples, export_corpus, write_corpus
+from pyosl.tools.rdf_export import _merge
+from pyosl.test.fixtures import make_machines
+
+
+class TestExportCorpus(unittest.TestCase):
+    """ Tests parallel export of documents to N-Triples"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.machines = make_machines()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected(self):
+        """ The triples written by a single exporter """
+        filename = os.path.join(self.tmp.name, 'single.nt')
+        with StreamingTriples(filename, deterministic=True) as stream:
+            for machine in self.machines:
+                stream.add_instance(machine)
+        with open(filename) as f:
+            return set(f)
+
+    def lines(self, filename):
+        """ The triples written (compared as lines, since parsers relabel blank nodes)"""
+        with open(filename) as f:
+            return list(f)
+
+    def test_export(self):
+        filename = os.path.join(self.tmp.name, 'merged.nt')
+        # one document per part, so the vendor is exported by both workers
+        summary = export_corpus(self.machines, filename, workers=2, chunk_size=1)
+        # no workspace left behind
+        self.assertEqual(os.listdir(self.tmp.name), ['merged.nt'])
+        merged = self.lines(filename)
+        self.assertEqual(len(merged), len(set(merged)))
+        self.assertEqual(set(merged), self.expected())
+        self.assertEqual(summary['triples'], len(merged))
+        self.assertEqual(summary['documents'], 2)
+        self.assertIn(self.machines[0].vendor.url.linkage, summary['entities'])
+
+    def test_corpus(self):
+        corpus = os.path.join(self.tmp.name, 'machines.jsonl')
+        write_corpus(corpus, self.machines)
+        filename = os.path.join(self.tmp.name, 'merged.nt')
+        export_corpus(corpus, filename, workers=1)
+        self.assertEqual(set(self.lines(filename)), self.expected())
+
+    def test_merge_blanks(self):
+        """ The blank nodes under a description which is skipped are skipped with it """
+        vendor = ['_:v1 <p> "Cray" .\n', '_:v0 <p> _:v1 .\n', '<vendor> <p> _:v0 .\n']
+        parts = [(['<a> <p> <vendor> .\n', '_:a0 <p> "A" .\n', '<a> <p> _:a0 .\n'] + vendor,
+                  ['a', 'vendor']),
+                 (['<b> <p> <vendor> .\n', '_:b0 <p> "B" .\n', '<b> <p> _:b0 .\n'] + vendor,
+                  ['b', 'vendor'])]
+        for n, (lines, entities) in enumerate(parts):
+            with open(os.path.join(self.tmp.name, f'part{n}.nt'), 'w') as f:
+                f.writelines(lines)
+        filename = os.path.join(self.tmp.name, 'merged.nt')
+        entities, triples = _merge([(os.path.join(self.tmp.name, f'part{n}.nt'), e)
+                                    for n, (lines, e) in enumerate(parts)], filename)
+        merged = self.lines(filename)
+        self.assertEqual(triples, 9)
+        self.assertEqual(set(merged), set(parts[0][0] + parts[1][0]))
+        self.assertEqual(entities, {'a', 'b', 'vendor'})
+
+
+class TestIncremental(unittest.TestCase):
+    """ Tests updating the triples of changed documents"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.machines = make_machines()
+
+    def fresh(self):
+        """ The graph of a complete export """
+        exporter = Triples2(deterministic=True)
+        for machine in self.machines:
+            exporter.add_instance(machine)
+        return set(exporter.g)
+
+    def test_update(self):
+        exporter = Triples2(deterministic=True, incremental=True)
+        for machine in self.machines:
+            self.assertTrue(exporter.update_instance(machine))
+        self.assertEqual(set(exporter.g), self.fresh())
+        # unchanged documents are skipped
+        for machine in self.machines:
+            self.assertFalse(exporter.update_instance(machine))
+
+        machine = self.machines[0]
+        machine.name = 'Archer3'
+        self.assertTrue(exporter.update_instance(machine))
+        self.assertEqual(set(exporter.g), self.fresh())
+        self.assertNotIn(Literal('Archer'), set(exporter.g.objects()))
+
+        # a change to a shared document, seen through either document which uses it
+        machine.vendor.name = 'HPE'
+        self.assertTrue(exporter.update_instance(self.machines[1]))
+        self.assertEqual(set(exporter.g), self.fresh())
+        self.assertTrue(exporter.update_instance(machine))
+        self.assertEqual(set(exporter.g), self.fresh())
+
+    def test_update_external(self):
+        """ External entities (here, the vendor url) are replaced along with their documents """
+        exporter = Triples2(deterministic=True, incremental=True)
+        for machine in self.machines:
+            exporter.update_instance(machine)
+        vendor = self.machines[0].vendor
+        vendor.url.name = 'Home page'
+        self.assertTrue(exporter.update_instance(self.machines[0]))
+        self.assertEqual(set(exporter.g), self.fresh())
+        old = URIRef(vendor.url.linkage)
+        vendor.url = online('https://hpe.com', 'Website')
+        self.assertTrue(exporter.update_instance(self.machines[1]))
+        self.assertEqual(set(exporter.g), self.fresh())
+        self.assertNotIn(old, set(exporter.g.subjects()))
+        self.assertNotIn(str(old), exporter.objects)
+
+    def test_not_incremental(self):
+        exporter = Triples2()
+        exporter.add_instance(self.machines[0])
+        with self.assertRaises(ValueError):
+            exporter.update_instance(self.machines[0])
+        self.assertEqual(exporter.subgraphs, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
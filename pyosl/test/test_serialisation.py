@@ -3,9 +3,10 @@ from pathlib import Path
 
 from pyosl import Factory
 from pyosl.tools import esd_decode, de_camel_attribute
-from pyosl.tools import esd_encode
+from pyosl.tools import esd_encode, esd_transcode, esd_transcode_json
 from pyosl.tools import osl_encode2json, bundle_instance
-from pyosl.tools import osl_decode_json
+from pyosl.tools import osl_decode_json, osl_decode, osl_encode
+from pyosl.tools import canonical_json, content_hash, Projection, online
 
 import json
 
@@ -105,5 +106,187 @@ class TestOSLroundtrip(unittest.TestCase):
             print(odoc)
 
 
+class TestTranscode(unittest.TestCase):
+    """ Tests transcoding ESD json directly into OSL json"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.instances = Path.cwd().glob('test_input/*')
+
+    def test_transcode(self):
+        for x in self.instances:
+            with x.open() as f:
+                esd_json = f.read()
+            python_version = esd_decode(Factory, json.loads(esd_json))
+            content, bundle = osl_encode(python_version)
+            self.assertEqual(esd_transcode(json.loads(esd_json)), content)
+            osl_json = esd_transcode_json(esd_json)
+            assert osl_decode_json(Factory, osl_json) == python_version
+
+    def test_time_fixup(self):
+        esd_content = {'meta': {'type': 'cim.2.designing.TemporalConstraint'},
+                       'name': 'Start', 'startDate': '1850-01-01'}
+        osl_content = esd_transcode(esd_content, validate=True)
+        self.assertEqual(osl_content['start_date']['value'], '1850-01-01')
+        self.assertEqual(osl_decode(Factory, osl_content).start_date.value, '1850-01-01')
+        python_version = esd_decode(Factory, esd_content)
+        self.assertEqual(python_version.start_date.value, '1850-01-01')
+
+    def test_validate(self):
+        esd_content = {'meta': {'type': 'cim.2.designing.TemporalConstraint'}, 'notAProperty': 1}
+        esd_transcode(esd_content)
+        with self.assertRaises(ValueError):
+            esd_transcode(esd_content, validate=True)
+
+
+class TestLazyDecode(unittest.TestCase):
+    """ Tests lazy decoding of nested content"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.instances = Path.cwd().glob('test_input/*')
+
+    def test_lazy(self):
+        for x in self.instances:
+            with x.open() as f:
+                python_version = esd_decode(Factory, json.load(f))
+                json_version = osl_encode2json(python_version)
+                lazy_version = osl_decode_json(Factory, json_version, lazy=True)
+                # nested content is not yet decoded
+                self.assertIsNotNone(lazy_version.__dict__['responsible_parties']._pending)
+                self.assertEqual(lazy_version.name, python_version.name)
+                self.assertEqual(lazy_version._meta.uid, python_version._meta.uid)
+                parties = lazy_version.responsible_parties
+                self.assertIsNone(lazy_version.__dict__['responsible_parties']._pending)
+                self.assertIs(lazy_version.responsible_parties, parties)
+                assert lazy_version == python_version
+
+    def test_lazy_validation(self):
+        """ Test validation happens on access"""
+        document = Factory.new_document('designing.project')
+        document.name = 'Project'
+        content, bundle = osl_encode(document)
+        content['sub_projects'] = [{'_meta': {'type': 'cim.2.shared.party'}}]
+        project = osl_decode(Factory, content, lazy=True)
+        self.assertEqual(project.name, 'Project')
+        with self.assertRaises(ValueError) as context:
+            project.sub_projects
+        self.assertIn('is not of type linked_to(designing.project)', str(context.exception))
+
+
+class TestMemoise(unittest.TestCase):
+    """ Tests encoding of shared and cyclic content"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+
+    def test_shared(self):
+        component = Factory.build('software.software_component')
+        component.name = 'Parent'
+        child = Factory.build('software.software_component')
+        child.name = 'Child'
+        component.sub_components = [child, child]
+        content, bundle = osl_encode(component)
+        self.assertIs(content['sub_components'][0], content['sub_components'][1])
+        self.assertEqual(osl_decode(Factory, content), component)
+        esd_content = esd_encode(component)
+        self.assertIs(esd_content['subComponents'][0], esd_content['subComponents'][1])
+        self.assertEqual(esd_decode(Factory, esd_content), component)
+
+    def test_shared_meta(self):
+        party = Factory.new_document('shared.party')
+        party.name = 'Cray'
+        machine = Factory.new_document('platform.machine')
+        machine.name = 'Archer'
+        machine.vendor = party
+        machine._meta = party._meta
+        content, bundle = osl_encode(machine)
+        self.assertEqual(content['_meta']['type'], 'cim.2.platform.machine')
+        self.assertEqual(content['vendor']['_meta']['type'], 'cim.2.shared.party')
+        esd_content = esd_encode(machine)
+        self.assertNotEqual(esd_content['meta']['type'], esd_content['vendor']['meta']['type'])
+
+    def test_cycles(self):
+        component = Factory.build('software.software_component')
+        component.name = 'Ouroboros'
+        component.sub_components = [component]
+        with self.assertRaises(ValueError):
+            osl_encode(component)
+        with self.assertRaises(ValueError):
+            esd_encode(component)
+        project = Factory.new_document('designing.project')
+        project.name = 'Project'
+        project.sub_projects = [project]
+        content, bundle = osl_encode(project)
+        self.assertEqual(content['sub_projects'][0]['id'], project._meta.uid)
+        self.assertEqual(esd_encode(project)['subProjects'][0]['id'], project._meta.uid)
+
+
+class TestCanonical(unittest.TestCase):
+    """ Tests canonical json and content hashes"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+
+    def test_canonical(self):
+        first = Factory.new_document('shared.party')
+        first.name = 'Bryan'
+        first.email = 'bryan@example.com'
+        second = Factory.new_document('shared.party')
+        second.email = 'bryan@example.com'
+        second.name = 'Bryan'
+        second._meta.uid = first._meta.uid
+        self.assertNotEqual(osl_encode2json(first), osl_encode2json(second))
+        self.assertEqual(osl_encode2json(first, canonical=True), osl_encode2json(second, canonical=True))
+        self.assertEqual(osl_decode_json(Factory, canonical_json(first)), first)
+        self.assertEqual(content_hash(first), content_hash(second))
+        self.assertEqual(content_hash(first), content_hash(osl_encode(first)[0]))
+        second._meta.version = 2
+        self.assertEqual(content_hash(first), content_hash(second))
+        second.name = 'Bryan Lawrence'
+        self.assertNotEqual(content_hash(first), content_hash(second))
+
+    def test_numbers(self):
+        number = Factory.build('shared.numeric')
+        number.value = -0.0
+        self.assertEqual(canonical_json(number), canonical_json({'value': 0.0, '_meta': osl_encode(number)[0]['_meta']}))
+        number.value = float('nan')
+        with self.assertRaises(ValueError):
+            canonical_json(number)
+
+
+class TestProjection(unittest.TestCase):
+    """ Tests encoding with projections"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.party = Factory.new_document('shared.party')
+        self.party.name = 'Bryan'
+        self.party.email = 'bryan@example.com'
+        self.party.url = online('http://www.bnlawrence.net', 'personal website')
+
+    def test_paths(self):
+        content, bundle = osl_encode(self.party, projection={'name', '_meta.uid', 'url.linkage'})
+        self.assertEqual(set(content), {'name', '_meta', 'url'})
+        self.assertEqual(set(content['_meta']), {'uid', 'type', 'source_key'})
+        self.assertEqual(set(content['url']), {'linkage', '_meta'})
+        summary = osl_decode(Factory, content)
+        self.assertEqual(summary.name, 'Bryan')
+        self.assertIsNone(summary.email)
+        self.assertEqual(summary.url.linkage, 'http://www.bnlawrence.net')
+        content, bundle = osl_encode(self.party, projection=['url', 'url.name'])
+        self.assertEqual(content['url'], osl_encode(self.party.url)[0])
+        esd_content = esd_encode(self.party, projection=['name', 'orcid_id', 'url.linkage'])
+        self.assertEqual(set(esd_content), {'name', 'url', 'meta'})
+
+    def test_by_class(self):
+        projection = Projection({'shared.online_resource': ['linkage']})
+        content = json.loads(osl_encode2json(self.party, projection=projection))
+        self.assertEqual(content['email'], 'bryan@example.com')
+        self.assertEqual(set(content['url']), {'linkage', '_meta'})
+        with self.assertRaises(ValueError):
+            osl_encode(self.party, True, set(), projection)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import tempfile
+import os
+
+from pyosl import Factory
+from pyosl.tools import get_reference_for, new_document
+from pyosl.tools import FileStore, SQLiteStore, DocumentResolver, LRUCache
+
+
+class TestStores(unittest.TestCase):
+    """ Test the document stores and reference resolution"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.tmp = tempfile.TemporaryDirectory()
+        author = new_document('shared.party', 'Bryan Lawrence')
+        reference = get_reference_for(author)
+        self.docs = [author,
+                     new_document('platform.machine', 'Archer', reference),
+                     new_document('platform.machine', 'Archer2', reference)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def stores(self):
+        return [FileStore(os.path.join(self.tmp.name, 'files')),
+                SQLiteStore(os.path.join(self.tmp.name, 'store.db'))]
+
+    def test_index(self):
+        for store in self.stores():
+            with store:
+                for d in self.docs:
+                    store.add(d)
+                self.assertEqual(len(store), 3)
+                self.assertEqual(len(store.find('platform.machine')), 2)
+                self.assertEqual(len(store.find('cim.2.platform.machine', 'Archer')), 1)
+                self.assertEqual(store.find(name='Bryan Lawrence'), [self.docs[0]._meta.uid])
+                with self.assertRaises(KeyError):
+                    store.get('not-a-uid')
+        # and reopen
+        for store in self.stores():
+            self.assertEqual(len(store.find('shared.party')), 1)
+            store.close()
+
+    def test_sqlite_type_index(self):
+        store = SQLiteStore(os.path.join(self.tmp.name, 'store.db'))
+        for d in self.docs:
+            store.add(d)
+        # underscores are not wildcards
+        store._add({}, 'not-a-machine', 'cim.2.platformxmachine', None, None)
+        self.assertEqual(len(store.find('platform_machine')), 0)
+        self.assertEqual(len(store.find('platform.machine')), 2)
+        plan = store.db.execute('EXPLAIN QUERY PLAN SELECT uid FROM documents WHERE type = ? OR klass = ?',
+                                ('platform.machine', 'platform.machine')).fetchall()
+        self.assertNotIn('SCAN documents', ' '.join(str(row[-1]) for row in plan))
+        store.close()
+
+    def test_file_store_uids(self):
+        store = FileStore(os.path.join(self.tmp.name, 'files'))
+        for uid in ['../escaped', 'sub/dir', '..\\escaped', '.hidden', 'index', '']:
+            self.docs[0]._meta.uid = uid
+            with self.assertRaises(ValueError):
+                store.add(self.docs[0])
+        self.assertEqual(len(store), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'escaped.json')))
+
+    def test_resolver(self):
+        for store in self.stores():
+            for d in self.docs:
+                store.add(d)
+            resolver = DocumentResolver(store, Factory, maxsize=2)
+            reference = get_reference_for(self.docs[1])
+            machine = resolver.resolve(reference)
+            self.assertEqual(machine, self.docs[1])
+            self.assertIs(resolver.resolve(reference), machine)
+            self.assertEqual(resolver.resolve(machine._meta.author).name, 'Bryan Lawrence')
+            resolver.resolve(self.docs[2]._meta.uid)
+            self.assertEqual(len(resolver.cache), 2)
+            self.assertEqual(resolver.cache.hits, 1)
+            reference.type = 'shared.party'
+            with self.assertRaises(ValueError):
+                resolver.resolve(reference)
+            store.close()
+
+    def test_lru(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from pathlib import Path
+import json
+
+from pyosl import Factory
+from pyosl.tools import osl_validate, esd_validate, esd_transcode, osl_encode
+from pyosl.tools import new_document, named_build, numeric_value, get_reference_for
+
+
+class TestValidator(unittest.TestCase):
+    """ Test validation of serialised content against the ontology"""
+
+    def setUp(self):
+        Factory.reset_descriptor()
+        self.instances = Path.cwd().glob('test_input/*')
+
+    def test_valid(self):
+        for x in self.instances:
+            with x.open() as f:
+                esd_content = json.load(f)
+            self.assertEqual(esd_validate(esd_content), [])
+            # pyesdoc author references carry a uid, which esd_validate forgives
+            for error in osl_validate(esd_transcode(esd_content)):
+                self.assertTrue(error.startswith('/_meta/author: Unknown property uid'))
+
+    def test_encoded(self):
+        author = new_document('shared.party', 'Bryan')
+        machine = new_document('platform.machine', 'Archer', get_reference_for(author))
+        pool = named_build('platform.storage_pool', 'Work')
+        pool.file_system_sizes = [numeric_value(1.4, 'PB')]
+        machine.storage_pools = [pool]
+        content, bundle = osl_encode(machine)
+        self.assertEqual(osl_validate(content), [])
+
+    def test_all_errors(self):
+        """ Test we get all the errors in one go"""
+        content = {'_meta': {'type': 'cim.2.designing.ensemble_requirement', 'uid': 1},
+                   'ensemble_type': 'Not a type',
+                   'minimum_size': 'one',
+                   'not_a_property': 1,
+                   'citations': {'_meta': {'type': 'cim.2.shared.doc_reference'}, 'type': 'cim.2.shared.citation'},
+                   'responsible_parties': [
+                       {'_meta': {'type': 'cim.2.shared.responsibility'},
+                        'role': 'point of contact',
+                        'parties': [{'_meta': {'type': 'cim.2.shared.doc_reference'},
+                                     'type': 'cim.2.designing.project'},
+                                    {'_meta': {'type': 'cim.2.shared.unknown'}}]}]}
+        errors = osl_validate(content)
+        expected = {'/ensemble_type: "Not a type" is not a member of designing.ensemble_types',
+                    '/minimum_size: Expected int, found str',
+                    '/: Unknown property not_a_property for designing.ensemble_requirement',
+                    '/: Single value for list property citations',
+                    '/: Missing required property name of designing.ensemble_requirement',
+                    '/responsible_parties/0/parties/0: Doc_Reference to designing.project is not a shared.party '
+                    '(property parties)',
+                    '/responsible_parties/0/parties/1: Unknown type cim.2.shared.unknown',
+                    '/_meta/uid: Expected str, found int'}
+        self.assertEqual(len(errors), len(expected))
+        self.assertEqual(set(errors), expected)
+
+    def test_unknown_type(self):
+        self.assertEqual(len(osl_validate({'name': 'x'})), 1)
+        self.assertEqual(len(esd_validate({'meta': {'type': 'cim.2.shared.NotAType'}})), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
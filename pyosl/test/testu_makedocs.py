@@ -1,8 +1,7 @@
 from pyosl import Factory, Ontology
 from jinja2 import Template
 import unittest
-from pyosl.uml import (uml4_time, uml4_iso, uml4_drs, uml4_cmip, uml4_design, uml4_data, uml4_activity,
-                       uml4_platform, uml4_science, uml4_shared, uml4_software)
+from pyosl.uml import build_diagrams
 
 from pyosl.uml import UmlBase
 Factory.register(Ontology(UmlBase))
@@ -67,28 +66,12 @@ fig_template = r"""
 """
 
 
-DIAGRAMS = {
-    'activity': uml4_activity,
-    'data': uml4_data,
-    'designing': uml4_design,
-    'shared': uml4_shared,
-    'iso': uml4_iso,
-    'drs': uml4_drs,
-    'platform': uml4_platform,
-    'science': uml4_science,
-    'software': uml4_software,
-    'cmip': uml4_cmip,
-    'time': uml4_time,
-}
-
-
 def tex_safe(s):
     s = str(s).replace('_',r'\textunderscore\-').replace('%',r'\%').replace('&',r'\&').replace('#',r'\#')
     return s.replace('.',r'.\-').rstrip()
 
 def add_section(package):
-    # regenerate diagrams
-    DIAGRAMS[package]()
+    # (diagrams already regenerated)
     d = Template(fig_template)
     pfile = f'test_output/doc_{package}.pdf'
     return d.render(p=package, pfile=pfile)
@@ -100,6 +83,17 @@ def make_documentation():
     t = Template(item_template)
     d = Template(doc_template)
 
+    # regenerate all the diagrams at once, in parallel
+    built = build_diagrams(Factory.ontology.constructors)
+    failed = []
+    for p, result in built.items():
+        if result['error']:
+            failed.append(p)
+        else:
+            print(f'{p} diagram built in {result["seconds"]:.2f}s')
+    if failed:
+        raise ValueError(f'Failed to build diagrams for {failed}:\n' + '\n'.join(built[p]['error'] for p in failed))
+
     for p in Factory.ontology.constructors:
 
         content += add_section(p)
@@ -1,16 +1,29 @@
-import unittest, os
+import unittest, os, multiprocessing
+from unittest import mock
 
 from pyosl import Factory, Ontology
 
 from pyosl.uml import BasicUML
 from pyosl.uml import PackageUML
-from pyosl.uml import UmlBase
+from pyosl.uml import UmlBase, association_graph, build_diagrams, DIAGRAMS
+from pyosl.uml.uml_diagrams import _target
 
+from pyosl.uml import uml4_packages
 from pyosl.uml import uml4_activity, uml4_cmip, uml4_data, uml4_design, \
     uml4_drs, uml4_iso, uml4_platform, uml4_science, uml4_shared, uml4_software, \
     uml4_time
 
 
+def _fail():
+    raise RuntimeError('Result cannot be unpickled')
+
+
+class _Unpicklable:
+    """ A result which fails when it is received """
+    def __reduce__(self):
+        return _fail, ()
+
+
 class TestGraphCases(unittest.TestCase):
 
     def setUp(self):
@@ -41,6 +54,57 @@ class TestGraphCases(unittest.TestCase):
         d.direct_edge_ports([('designing.project','designing.project','sub_projects','s','s'),])
         d.generate_pdf()
 
+    def test_association_graph(self):
+        """ Test the association graph agrees with the metadata of built instances,
+        and that diagrams are expanded from it """
+        graph = association_graph(Factory.ontology)
+        self.assertIs(graph, association_graph(Factory.ontology))
+        self.assertEqual(_target(('parties', 'linked_to(shared.party:hint)', '1.N')), 'shared.party')
+        for klass in Factory.ontology.klasses:
+            meta = Factory.build(klass)._osl
+            targets = [_target(p) for p in getattr(meta, 'properties', [])]
+            expected = [t for t in targets if t not in Factory.ontology.builtins]
+            self.assertEqual(set(graph.associated(klass, bases=False)), set(expected))
+            self.assertEqual(graph.associated(klass, associations=False),
+                             [meta.base] if getattr(meta, 'base', None) else [])
+        d = BasicUML('test_output/testing_graph', option='box')
+        d.set_visible_classes(['designing.project'], expand_base=False)
+        self.assertEqual(set(d.allup), {'designing.project'} | set(graph.associated('designing.project', bases=False)))
+
+    def test_build_diagrams(self):
+        """ Test building diagrams in parallel, with failures kept to their own diagram """
+        for package in ['software', 'platform']:
+            if os.path.exists(f'test_output/doc_{package}.pdf'):
+                os.remove(f'test_output/doc_{package}.pdf')
+        results = build_diagrams(['software', 'platform', 'no_such_package'], workers=2)
+        self.assertEqual(list(results), ['software', 'platform', 'no_such_package'])
+        for package in ['software', 'platform']:
+            self.assertIsNone(results[package]['error'])
+            self.assertGreater(results[package]['seconds'], 0)
+            self.assertTrue(os.path.exists(f'test_output/doc_{package}.pdf'))
+        self.assertIn('No UML diagram for package', results['no_such_package']['error'])
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', 'needs workers forked from the test')
+    def test_build_diagrams_dead_worker(self):
+        """ Test a worker which dies only loses its own diagram """
+        DIAGRAMS['crash'] = lambda: os._exit(1)
+        try:
+            results = build_diagrams(['crash', 'software', 'platform'], workers=1)
+        finally:
+            del DIAGRAMS['crash']
+        self.assertIn('died', results['crash']['error'])
+        self.assertIsNone(results['software']['error'])
+        self.assertIsNone(results['platform']['error'])
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', 'needs workers forked from the test')
+    def test_build_diagrams_bad_result(self):
+        """ Test a result which cannot be received is recorded as that diagram's error """
+        with mock.patch.object(uml4_packages, '_build_diagram', lambda package: _Unpicklable()):
+            results = build_diagrams(['software', 'platform'], workers=2)
+        for package in ['software', 'platform']:
+            self.assertIn('Result cannot be unpickled', results[package]['error'])
+        self.assertEqual(multiprocessing.active_children(), [])
+
     def test_makediagrams_and_omit(self):
         """ Simply makes activity diagrams """
         d = BasicUML('test_output/testing1', option='uml')
@@ -3,6 +3,9 @@ from .esd_decoder import (translate_type_to_osl_from_esd,
                           de_camel_attribute,
                           esd_decode)
 
+from .esd_transcoder import (esd_transcode,
+                             esd_transcode_json)
+
 from .esd_encoder import (encamel,
                           esd_encode)
 
@@ -11,7 +14,29 @@ from .osl_decoder import (check_target_understood,
                           osl_decode_json)
 from .osl_encoder import (osl_encode,
                           osl_encode2json,
-                          bundle_instance)
+                          bundle_instance,
+                          canonical_json,
+                          content_hash,
+                          Projection)
+from .osl_validator import (osl_validate,
+                            esd_validate)
+from .osl_binary import (osl_pack,
+                         osl_unpack,
+                         osl_encode2binary,
+                         osl_decode_binary)
+from .osl_bundle import (BundleWriter,
+                         BundleReader,
+                         write_bundle)
+from .osl_corpus import (CorpusWriter,
+                         CorpusReader,
+                         write_corpus)
+from .osl_cache import EncodingCache
+from .osl_store import (LRUCache,
+                        FileStore,
+                        SQLiteStore,
+                        DocumentResolver)
+from .osl_schema import (OntologyTables,
+                         ontology_tables)
 
 from .osl_tools import (named_build,
                         new_document,
@@ -22,7 +47,8 @@ from .osl_tools import (named_build,
                         conditional_copy,
                         get_reference_for)
 
-from .osl_to_rdf import (Triples, Triples2, NAMESPACE)
-
-
-
+from .osl_to_rdf import (Triples, Triples2, StreamingTriples, SQLiteTriples, NAMESPACE)
+from .osl_query import TripleIndex
+from .rdf_to_osl import (RDFDecoder,
+                         rdf_decode)
+from .rdf_export import export_corpus
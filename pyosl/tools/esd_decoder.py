@@ -3,6 +3,7 @@
 import re
 
 from pyosl import DocRefNoType
+from pyosl.diagnostics import diagnose, logger
 from .osl_tools import make_time
 
 
@@ -24,7 +25,7 @@ def de_camel_attribute(n):
     return d2
 
 
-def _decode(factory, content, klass, debug=True):
+def _decode(factory, content, klass):
     """ Decode json content into a python instance of that content"""
 
     instance = factory.build(klass)
@@ -58,7 +59,7 @@ def _decode(factory, content, klass, debug=True):
             try:
                 setattr(instance, name, alist)
             except:
-                print('wait')# this is debug code for what looks like data
+                logger.error(f'Unable to set list property {name} of {klass}')
                 raise
         else:
             if instance._osl.type_key == 'cim.2.shared.doc_reference':
@@ -72,11 +73,10 @@ def _decode(factory, content, klass, debug=True):
                     value = make_time(value)
                 except:
                     raise err
+                setattr(instance, name, value)
 
-    if instance and debug:
-        ### Used to look for classes which may be problematic in some way.
-        if 'software' in instance._osl.type_key:
-            print(f'Deserialised {instance._osl.type_key}')
+    # Used to look for classes which may be problematic in some way.
+    diagnose('esd decoded', instance.__class__.__name__)
 
     return instance
 
@@ -88,11 +88,13 @@ def esd_decode(factory, json_dict):
         doc_type = json_dict['meta']['type']
 
     except KeyError:
-        print(json_dict)
+        logger.error(f'No type key in {json_dict}')
         raise KeyError('Document from pyesdoc has invalid type key.')
 
     # two important differences between pyesdoc and pyosl:
     doc_type = translate_type_to_osl_from_esd(doc_type)
+    # (and don't change the content we were given, which may be shared)
+    json_dict = dict(json_dict)
     if len(json_dict['meta'].keys()) == 1:
         del json_dict['meta']
     else:
@@ -2,6 +2,9 @@
 # Based on Mark Greenslade's pyesdoc/_codecs/dictionary/encoder.py
 
 from pyosl import Property
+from pyosl.diagnostics import diagnose
+from .osl_tools import get_reference_for
+from .osl_encoder import _projection
 
 def _is_encodable_attribute(name):
     """Returns flag indicating whether an attribute is encodable.
@@ -22,22 +25,57 @@ def encamel(key):
     return ''.join(bits)
 
 
-def esd_encode(doc):
+def esd_encode(doc, projection=None):
     """Encodes a document.
+    Sub-objects which are shared within doc are only encoded once, and the
+    encoded content reused (so the same dictionary appears wherever it occurs).
+    Documents which refer back to themselves are encoded as references at the
+    point of recursion, other reference cycles raise a ValueError.
     :param doc: Document being encoded.
     :type doc: object
+    :param projection: Optional Projection (or specification of one, see osl_encode)
+        limiting the attributes encoded. Attributes are named as in osl, not pyesdoc.
     :returns: An encoded document representation.
     :rtype: dict
     """
+    return _encode(doc, {}, {}, _projection(projection))
+
+
+def _value(entity):
+    if isinstance(entity, Property):
+        return entity.value
+    else:
+        return entity
+
+
+def _encode(doc, memo, active, projection=None):
+    """ Implements esd_encode, with memo (encoded content keyed by the identity of
+    instances already encoded, and of the projection used) and active (instances
+    currently being encoded)."""
+
+    memo_key = (id(doc), id(projection))
+    if memo_key in memo:
+        diagnose('shared', doc.__class__.__name__)
+        return memo[memo_key]
+
+    if id(doc) in active:
+        diagnose('cycle', doc.__class__.__name__)
+        if doc._osl.is_document:
+            return _encode(get_reference_for(doc), {}, {})
+        path = list(active.values())[list(active).index(id(doc)):]
+        path = ' -> '.join([a.__class__.__name__ for a in path])
+        raise ValueError(f'Reference cycle encoding {path} -> {doc.__class__.__name__}')
+
     obj = dict()
+    active[id(doc)] = doc
 
-    def _value(entity):
-        if isinstance(entity, Property):
-            return entity.value
-        else:
-            return entity
+    fields = projection.fields(doc.__class__.__name__) if projection else None
+    if fields is None:
+        items = list(doc.__dict__.items())
+    else:
+        items = [(k, v) for k, v in doc.__dict__.items() if k in fields]
 
-    for key, val in doc.__dict__.items():
+    for key, val in items:
         # Escape private/magic properties, except for the osl private metadata which we do want to encode
         if not _is_encodable_attribute(key):
             continue
@@ -57,7 +95,7 @@ def esd_encode(doc):
             # ... pyesdoc types;
 
             if hasattr(val, '_osl'):
-                obj[newkey] = esd_encode(val)
+                obj[newkey] = _encode(val, memo, active, projection.child(key) if projection else None)
                 #FIXME: Probably some things we have to pull out of meta and encode directly ...
             # ... simple types;
             elif val is not None:
@@ -71,15 +109,20 @@ def esd_encode(doc):
                     obj[newkey] = val
                 # ... collections;
                 else:
-                    obj[newkey] = [esd_encode(i) if hasattr(i, '_osl') else i for i in [_value(j) for j in val]]
+                    child = projection.child(key) if projection else None
+                    obj[newkey] = [_encode(i, memo, active, child) if hasattr(i, '_osl') else i
+                                   for i in [_value(j) for j in val]]
+
+    del active[id(doc)]
 
     # Inject type info to simplify decoding.
     klass = doc.__class__.__name__
     if klass != "shared.doc_meta_info":
-        if 'meta' not in obj:
-            obj['meta'] = {}
+        # (copied, since the encoded metadata may be memoised and shared)
+        obj['meta'] = dict(obj.get('meta', {}))
         obj['meta']['type'] = encamel(doc._osl.type_key)
         #if klass == 'shared.doc_reference':
         #    obj['type'] = f"{doc._osl.ontology_name}.{doc._osl.cim_version}.{obj['type']}"
-        print(klass, obj['meta']['type'])
+        diagnose('esd encoded', klass)
+    memo[memo_key] = obj
     return obj
@@ -0,0 +1,97 @@
+# Transcode json from the pyesdoc family directly into osl json, without building
+# instances. Applies the same mappings and fix-ups as esd_decode followed by osl_encode.
+
+import json
+
+from pyosl import Factory
+from .esd_decoder import translate_type_to_osl_from_esd, de_camel_attribute
+from .osl_decoder import _loads
+from .osl_encoder import _is_encodable_attribute, SERIAL_VERSION
+from .osl_schema import ontology_tables, target_klass
+from .osl_tools import is_time_string
+from .osl_validator import esd_validate
+
+
+def _empty(value):
+    """ osl_encode does not write empty values """
+    return value is None or (isinstance(value, (str, list)) and len(value) == 0)
+
+
+class _Transcoder:
+    """ Walks pyesdoc content producing osl content """
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def document(self, content):
+        """ Transcode a dictionary describing an instance """
+        try:
+            esd_type = content['meta']['type']
+        except KeyError:
+            raise KeyError('Document from pyesdoc has invalid type key.')
+        type_key = translate_type_to_osl_from_esd(esd_type)
+        klass = self.tables.klass_for(type_key)
+        obj = self.attributes(content, klass)
+
+        meta = {k: v for k, v in content['meta'].items() if k != 'type'}
+        meta = self.attributes(meta, 'shared.doc_meta_info')
+        if 'author' in meta and isinstance(meta['author'], dict) and 'type' not in meta['author']:
+            # FIXME: as for esd_decode, pyesdoc should include an author type.
+            meta['author']['type'] = 'cim.2.shared.party'
+        meta['type'] = type_key
+        meta['source_key'] = SERIAL_VERSION
+        obj['_meta'] = meta
+        return obj
+
+    def attributes(self, content, klass):
+        """ Transcode the attributes of an instance of klass"""
+        properties = self.tables.properties.get(klass, {})
+        obj = {}
+        for name, value in content.items():
+            if name == 'meta':
+                continue
+            name = de_camel_attribute(name)
+            if not _is_encodable_attribute(name):
+                continue
+            target = None
+            if name in properties:
+                target = target_klass(properties[name][0])
+            value = self.value(value, target)
+            if name == 'type' and klass == 'shared.doc_reference' and value:
+                value = translate_type_to_osl_from_esd(value)
+            if not _empty(value):
+                obj[name] = value
+        return obj
+
+    def value(self, value, target):
+        """ Transcode a value, coercing where the ontology target requires it"""
+        if isinstance(value, dict):
+            return self.document(value)
+        elif isinstance(value, list):
+            return [self.value(v, target) for v in value]
+        elif isinstance(value, str) and target == 'time.date_time' and is_time_string(value):
+            # Some esd encodings do not respect the time package.
+            # This is the encoded form of make_time(value).
+            return {'is_offset': False, 'value': value,
+                    '_meta': {'type': self.tables.type_keys[target], 'source_key': SERIAL_VERSION}}
+        return value
+
+
+def esd_transcode(json_dict, validate=False, ontology=None):
+    """ Transcode json esdoc content (as a dictionary) into osl encoded content.
+    :param json_dict: pyesdoc content
+    :param validate: If True, raise a ValueError listing any errors found by esd_validate
+    :param ontology: the ontology to use (default Factory.ontology)
+    :returns: the same dictionary as esd_decode followed by osl_encode would produce
+    """
+    if validate:
+        errors = esd_validate(json_dict, ontology)
+        if errors:
+            raise ValueError('Invalid esd content\n' + '\n'.join(errors))
+    tables = ontology_tables(ontology or Factory.ontology)
+    return _Transcoder(tables).document(json_dict)
+
+
+def esd_transcode_json(esd_json, validate=False):
+    """ Transcode a json esdoc string (or bytes, memoryview or mmap) into an osl json string """
+    return json.dumps(esd_transcode(_loads(esd_json), validate))
@@ -0,0 +1,268 @@
+# A compact binary serialisation of the osl json encoding, driven by the ontology.
+#
+# Every value is written as a one byte tag followed by its payload. Instances are
+# written with a numeric class identifier (rather than a type key and serialisation
+# version in _meta), their attributes by numeric property identifier (rather than name),
+# and enumeration values by member index. Identifiers come from the ontology tables,
+# so the ontology which wrote the content must also be used to read it, which we check
+# via the fingerprint in the header. Strings are only written once per message, any
+# repeats are written as back references.
+
+import struct
+
+from pyosl import Factory
+from .osl_encoder import osl_encode, SERIAL_VERSION
+from .osl_decoder import osl_decode
+from .osl_schema import ontology_tables, target_klass
+
+MAGIC = b'OSLB'
+BINARY_VERSION = 1
+
+NONE, TRUE, FALSE, INT, FLOAT, STR, STRREF, ENUM, LIST, DICT, OBJECT = range(11)
+
+# field identifiers within an object, property identifiers are offset by FIELD_OFFSET
+FIELD_NAMED, FIELD_META, FIELD_OFFSET = 0, 1, 2
+
+# flags for the content of _meta which is implied by the class identifier
+META_TYPE, META_SOURCE = 1, 2
+
+_DOUBLE = struct.Struct('<d')
+_HEADER = struct.Struct('<4sBI')
+
+
+class _Packer:
+    """ Packs osl encoded (dictionary) content into bytes """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.out = bytearray()
+        self.strings = {}
+
+    def uint(self, n):
+        """ Write an unsigned variable length integer """
+        while n > 0x7f:
+            self.out.append((n & 0x7f) | 0x80)
+            n >>= 7
+        self.out.append(n)
+
+    def string(self, s):
+        """ Write a string, or a reference to it if already written """
+        if s in self.strings:
+            self.out.append(STRREF)
+            self.uint(self.strings[s])
+        else:
+            self.strings[s] = len(self.strings)
+            data = s.encode('utf-8')
+            self.out.append(STR)
+            self.uint(len(data))
+            self.out += data
+
+    def value(self, value, target=None):
+        """ Write any value, using the property target for enumerations """
+        if value is None:
+            self.out.append(NONE)
+        elif value is True:
+            self.out.append(TRUE)
+        elif value is False:
+            self.out.append(FALSE)
+        elif isinstance(value, int):
+            self.out.append(INT)
+            # zigzag, so small negative numbers are small too
+            self.uint(value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif isinstance(value, float):
+            self.out.append(FLOAT)
+            self.out += _DOUBLE.pack(value)
+        elif isinstance(value, str):
+            if target in self.tables.member_ids and value in self.tables.member_ids[target]:
+                self.out.append(ENUM)
+                self.uint(self.tables.member_ids[target][value])
+            else:
+                self.string(value)
+        elif isinstance(value, list):
+            self.out.append(LIST)
+            self.uint(len(value))
+            for v in value:
+                self.value(v, target)
+        elif isinstance(value, dict):
+            self.dict(value)
+        else:
+            raise ValueError(f'Unable to pack value {value} of type {type(value)}')
+
+    def dict(self, content):
+        """ Write a dictionary, as an object if it describes an osl instance """
+        klass = None
+        meta = content.get('_meta')
+        if isinstance(meta, dict):
+            klass = self.tables.klass_for(meta.get('type'))
+        if klass is None or klass in self.tables.members:
+            self.out.append(DICT)
+            self.uint(len(content))
+            for k, v in content.items():
+                self.string(k)
+                self.value(v)
+        else:
+            self.out.append(OBJECT)
+            self.uint(self.tables.klass_ids[klass])
+            self.fields(content, klass)
+
+    def fields(self, content, klass):
+        """ Write the attributes of an instance of klass """
+        property_ids = self.tables.property_ids[klass]
+        properties = self.tables.properties[klass]
+        self.uint(len(content))
+        for k, v in content.items():
+            if k == '_meta' and isinstance(v, dict):
+                self.uint(FIELD_META)
+                self.meta(v, klass)
+            elif k in property_ids:
+                self.uint(property_ids[k] + FIELD_OFFSET)
+                self.value(v, target_klass(properties[k][0]))
+            else:
+                self.uint(FIELD_NAMED)
+                self.string(k)
+                self.value(v)
+
+    def meta(self, meta, klass):
+        """ Write the document metadata, leaving out anything implied by the class """
+        flags = 0
+        residual = dict(meta)
+        if residual.get('type') == self.tables.type_keys[klass]:
+            flags |= META_TYPE
+            del residual['type']
+        if residual.get('source_key') == SERIAL_VERSION:
+            flags |= META_SOURCE
+            del residual['source_key']
+        self.out.append(flags)
+        self.fields(residual, 'shared.doc_meta_info')
+
+
+class _Unpacker:
+    """ Unpacks bytes into osl encoded (dictionary) content """
+
+    def __init__(self, tables, data, offset):
+        self.tables = tables
+        self.data = data
+        self.pos = offset
+        self.strings = []
+
+    def uint(self):
+        """ Read an unsigned variable length integer """
+        n, shift = 0, 0
+        while True:
+            b = self.data[self.pos]
+            self.pos += 1
+            n |= (b & 0x7f) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def value(self, target=None):
+        """ Read any value """
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == NONE:
+            return None
+        elif tag == TRUE:
+            return True
+        elif tag == FALSE:
+            return False
+        elif tag == INT:
+            n = self.uint()
+            return -((n + 1) >> 1) if n & 1 else n >> 1
+        elif tag == FLOAT:
+            v = _DOUBLE.unpack_from(self.data, self.pos)[0]
+            self.pos += 8
+            return v
+        elif tag == STR:
+            n = self.uint()
+            s = bytes(self.data[self.pos:self.pos + n]).decode('utf-8')
+            self.pos += n
+            self.strings.append(s)
+            return s
+        elif tag == STRREF:
+            return self.strings[self.uint()]
+        elif tag == ENUM:
+            return self.tables.members[target][self.uint()]
+        elif tag == LIST:
+            return [self.value(target) for i in range(self.uint())]
+        elif tag == DICT:
+            content = {}
+            for i in range(self.uint()):
+                k = self.value()
+                content[k] = self.value()
+            return content
+        elif tag == OBJECT:
+            klass = self.tables.klasses[self.uint()]
+            return self.fields(klass)
+        raise ValueError(f'Corrupt binary osl content, unknown tag {tag} at {self.pos - 1}')
+
+    def fields(self, klass):
+        """ Read the attributes of an instance of klass"""
+        names = self.tables.property_names[klass]
+        properties = self.tables.properties[klass]
+        content = {}
+        for i in range(self.uint()):
+            field = self.uint()
+            if field == FIELD_META:
+                content['_meta'] = self.meta(klass)
+            elif field == FIELD_NAMED:
+                k = self.value()
+                content[k] = self.value()
+            else:
+                k = names[field - FIELD_OFFSET]
+                content[k] = self.value(target_klass(properties[k][0]))
+        return content
+
+    def meta(self, klass):
+        """ Read document metadata, restoring anything implied by the class """
+        flags = self.data[self.pos]
+        self.pos += 1
+        meta = self.fields('shared.doc_meta_info')
+        if flags & META_TYPE:
+            meta['type'] = self.tables.type_keys[klass]
+        if flags & META_SOURCE:
+            meta['source_key'] = SERIAL_VERSION
+        return meta
+
+
+def osl_pack(content, ontology=None):
+    """ Pack osl encoded content (as produced by osl_encode) into compact binary form.
+    :param content: osl encoded dictionary
+    :param ontology: ontology which defines the identifiers (default Factory.ontology)
+    :returns: bytes
+    """
+    tables = ontology_tables(ontology or Factory.ontology)
+    packer = _Packer(tables)
+    packer.out += _HEADER.pack(MAGIC, BINARY_VERSION, tables.fingerprint)
+    packer.value(content)
+    return bytes(packer.out)
+
+
+def osl_unpack(data, ontology=None):
+    """ Unpack binary content produced by osl_pack back into osl encoded content
+    :param data: bytes (or any buffer, e.g. memoryview)
+    :param ontology: ontology which defines the identifiers (default Factory.ontology)
+    :returns: osl encoded dictionary
+    """
+    tables = ontology_tables(ontology or Factory.ontology)
+    magic, version, fingerprint = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('Not binary osl content')
+    if version != BINARY_VERSION:
+        raise ValueError(f'Unsupported binary osl version {version}')
+    if fingerprint != tables.fingerprint:
+        raise ValueError(f'Binary osl content was not written with ontology {tables.name}.{tables.version}')
+    return _Unpacker(tables, data, _HEADER.size).value()
+
+
+def osl_encode2binary(obj):
+    """ Given an instance of an OSL document, encode into compact binary form """
+    content, bundle = osl_encode(obj, False)
+    # encoding should not bundle!
+    assert bundle == []
+    return osl_pack(content)
+
+
+def osl_decode_binary(factory, binary_content):
+    """ Decodes osl data encoded by osl_encode2binary """
+    return osl_decode(factory, osl_unpack(binary_content, factory.ontology))
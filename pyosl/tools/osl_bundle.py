@@ -0,0 +1,137 @@
+# Write (and read) bundles of osl encoded documents as single archive files.
+# Documents are sharded out of the instances added, and each document (identified
+# by _meta.uid) is encoded and written only once, however often it is referenced.
+
+import io
+import json
+import tarfile
+import zipfile
+
+from .osl_encoder import osl_encode, SERIAL_VERSION
+from .osl_decoder import osl_decode
+
+MANIFEST = 'manifest.json'
+
+_TAR_MODES = {None: 'w', 'gzip': 'w:gz', 'lzma': 'w:xz'}
+_ZIP_MODES = {None: zipfile.ZIP_STORED, 'gzip': zipfile.ZIP_DEFLATED, 'lzma': zipfile.ZIP_LZMA}
+
+
+class BundleWriter:
+    """ Streams the documents found in osl instances into a tar or zip archive,
+    with a manifest indexing the documents present."""
+
+    def __init__(self, filename, archive='tar', compression=None):
+        """
+        :param filename: Archive file to be written
+        :param archive: One of 'tar' or 'zip'
+        :param compression: One of None, 'gzip' or 'lzma'
+        """
+        if archive == 'tar':
+            if compression not in _TAR_MODES:
+                raise ValueError(f'Unknown compression {compression} for tar archive')
+            self.archive = tarfile.open(filename, _TAR_MODES[compression])
+            self.__write = self.__write_tar
+        elif archive == 'zip':
+            if compression not in _ZIP_MODES:
+                raise ValueError(f'Unknown compression {compression} for zip archive')
+            self.archive = zipfile.ZipFile(filename, 'w', compression=_ZIP_MODES[compression])
+            self.__write = self.__write_zip
+        else:
+            raise ValueError(f'Unknown archive type {archive}')
+        self.filename = filename
+        self.bundled = set()
+        self.manifest = []
+        self.roots = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __write_tar(self, member, data):
+        info = tarfile.TarInfo(member)
+        info.size = len(data)
+        self.archive.addfile(info, io.BytesIO(data))
+
+    def __write_zip(self, member, data):
+        self.archive.writestr(member, data)
+
+    def add(self, instance):
+        """ Add the documents in instance (which need not itself be a document)
+        to the archive, skipping any already present. Returns the number of
+        documents written."""
+        content, documents = osl_encode(instance, True, self.bundled)
+        if instance._osl.is_document:
+            if instance._meta.uid not in self.roots:
+                self.roots.append(instance._meta.uid)
+        else:
+            documents = [content] + documents
+        for document in documents:
+            meta = document['_meta']
+            uid = meta.get('uid')
+            member = f'{uid or len(self.manifest)}.json'
+            self.__write(member, json.dumps(document).encode('utf-8'))
+            self.manifest.append({'uid': uid,
+                                  'type': meta['type'],
+                                  'name': document.get('name'),
+                                  'version': meta.get('version'),
+                                  'member': member})
+        return len(documents)
+
+    def close(self):
+        """ Write the manifest and close the archive """
+        if self.archive:
+            manifest = {'source_key': SERIAL_VERSION, 'roots': self.roots, 'documents': self.manifest}
+            self.__write(MANIFEST, json.dumps(manifest).encode('utf-8'))
+            self.archive.close()
+            self.archive = None
+
+
+def write_bundle(filename, instances, archive='tar', compression=None):
+    """ Write the documents in a list of instances to a bundle archive, and
+    return the manifest."""
+    with BundleWriter(filename, archive, compression) as writer:
+        for instance in instances:
+            writer.add(instance)
+    return writer.manifest
+
+
+class BundleReader:
+    """ Reads documents from a bundle archive written by BundleWriter """
+
+    def __init__(self, filename):
+        if zipfile.is_zipfile(filename):
+            self.archive = zipfile.ZipFile(filename)
+            self.__read = self.archive.read
+        else:
+            self.archive = tarfile.open(filename)
+            self.__read = lambda member: self.archive.extractfile(member).read()
+        manifest = json.loads(self.__read(MANIFEST))
+        if not manifest['source_key'].endswith(SERIAL_VERSION):
+            raise ValueError(f"Bundle written with unsupported {manifest['source_key']}")
+        self.roots = manifest['roots']
+        self.manifest = manifest['documents']
+        self.index = {d['uid']: d for d in self.manifest if d['uid']}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        """ Iterate over the encoded documents, in the order written """
+        for d in self.manifest:
+            yield json.loads(self.__read(d['member']))
+
+    def get(self, uid):
+        """ Return the encoded document with a given uid """
+        return json.loads(self.__read(self.index[uid]['member']))
+
+    def decode(self, factory, uid):
+        """ Return the document with a given uid as an osl instance """
+        return osl_decode(factory, self.get(uid))
+
+    def close(self):
+        self.archive.close()
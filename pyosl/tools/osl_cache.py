@@ -0,0 +1,104 @@
+# A cache of encoded documents, for services which repeatedly encode the same
+# (usually published, and so unchanging) documents.
+
+import json
+
+from pyosl import PropertyDescriptor
+from .osl_encoder import _encode, canonical_json
+from .esd_encoder import _encode as _esd_encode
+from .osl_store import LRUCache
+
+
+class EncodingCache:
+    """ A size bounded cache of encoded documents, keyed by (_meta.uid, _meta.version, codec).
+    Entries are invalidated whenever the document, or any instance encoded with it, is
+    modified through its properties. (Changes made directly to the contents of a list
+    are not seen, use invalidate for those.) Caches observe every property change, so
+    should be closed when no longer needed."""
+
+    CODECS = ('json', 'canonical', 'bundle', 'esd_json')
+
+    def __init__(self, maxsize=128):
+        self.cache = LRUCache(maxsize)
+        self.contents = {}  # cache key: ids of the instances encoded
+        self.owners = {}  # instance id: cache keys of encodings which include it
+        PropertyDescriptor.observers.append(self._modified)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def encode(self, document, codec='json'):
+        """ Return the encoding of document, which is one of
+            json: osl json (as osl_encode2json),
+            canonical: canonical osl json (as osl_encode2json(document, canonical=True)),
+            bundle: a list of osl json documents (as bundle_instance),
+            esd_json: pyesdoc json (as esd_encode, dumped to json).
+        Instances without a uid are encoded, but not cached."""
+        if codec not in self.CODECS:
+            raise ValueError(f'Unknown codec {codec} for encoding cache')
+        uid = document._meta.uid if document._osl.is_document else None
+        if not uid:
+            return self.__encode(document, codec)[0]
+        key = (uid, document._meta.version, codec)
+        result = self.cache.get(key)
+        if result is None:
+            result, ids = self.__encode(document, codec)
+            evicted = self.cache.put(key, result)
+            if evicted:
+                self.__forget(evicted[0])
+            self.contents[key] = ids
+            for i in ids:
+                self.owners.setdefault(i, set()).add(key)
+        if codec == 'bundle':
+            return list(result)
+        return result
+
+    def __encode(self, document, codec):
+        """ Encode document, returning the encoding and the ids of all the instances encoded"""
+        memo = {}
+        if codec == 'bundle':
+            content, contents = _encode(document, True, set(), memo, {})
+            result = [json.dumps(c) for c in contents]
+        elif codec == 'esd_json':
+            result = json.dumps(_esd_encode(document, memo, {}))
+        else:
+            content, bundle = _encode(document, False, None, memo, {})
+            result = canonical_json(content) if codec == 'canonical' else json.dumps(content)
+        return result, {k[0] for k in memo}
+
+    def __forget(self, key):
+        """ Forget which instances were encoded for key """
+        for i in self.contents.pop(key, ()):
+            keys = self.owners.get(i)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.owners[i]
+
+    def _modified(self, instance, label):
+        """ Observer of property changes """
+        for key in self.owners.pop(id(instance), ()):
+            self.cache.invalidate(key)
+            self.__forget(key)
+
+    def invalidate(self, uid=None):
+        """ Forget all encodings of the document with uid (or of all documents) """
+        if uid is None:
+            self.cache.clear()
+            self.contents, self.owners = {}, {}
+        else:
+            for key in [k for k in self.cache.data if k[0] == uid]:
+                self.cache.invalidate(key)
+                self.__forget(key)
+
+    def __len__(self):
+        return len(self.cache)
+
+    def close(self):
+        """ Stop observing property changes """
+        if self._modified in PropertyDescriptor.observers:
+            PropertyDescriptor.observers.remove(self._modified)
+        self.invalidate()
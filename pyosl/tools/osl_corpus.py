@@ -0,0 +1,146 @@
+# Corpora of osl encoded documents held as json lines (one document per line), with
+# a sidecar index of byte offsets so that single documents can be read with one seek
+# and one parse, and the whole corpus can be scanned via a memory map.
+
+import json
+import mmap
+import os
+
+from .osl_encoder import osl_encode, SERIAL_VERSION
+from .osl_decoder import osl_decode, _loads
+from .osl_store import _summary, _type_matches
+
+
+def _index_name(filename):
+    return f'{filename}.idx'
+
+
+class CorpusWriter:
+    """ Appends osl encoded documents to a json lines corpus, and maintains its index.
+    Documents already in the corpus are superseded (in the index) by later versions."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.index = {}
+        if os.path.exists(filename):
+            with CorpusReader(filename) as reader:
+                self.index = reader.index
+        self.file = open(filename, 'ab')
+        self.offset = self.file.seek(0, os.SEEK_END)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, document):
+        """ Add a document, which may be an osl instance or encoded content. Returns the uid."""
+        if hasattr(document, '_osl'):
+            if not document._osl.is_document:
+                raise ValueError(f'Not-a-Document: Cannot add {document} to corpus')
+            document, ignore = osl_encode(document)
+        uid, type_key, name, version = _summary(document)
+        line = json.dumps(document).encode('utf-8') + b'\n'
+        self.file.write(line)
+        self.index[uid] = [self.offset, len(line) - 1, type_key, name]
+        self.offset += len(line)
+        return uid
+
+    def close(self):
+        """ Write the index and close the corpus """
+        if self.file:
+            self.file.close()
+            self.file = None
+            with open(_index_name(self.filename), 'w') as f:
+                json.dump({'source_key': SERIAL_VERSION, 'size': self.offset, 'documents': self.index}, f)
+
+
+def write_corpus(filename, documents):
+    """ Write (or append) a list of documents to a corpus, and return their uids """
+    with CorpusWriter(filename) as writer:
+        return [writer.add(d) for d in documents]
+
+
+class CorpusReader:
+    """ Reads documents from a json lines corpus written by CorpusWriter. The index
+    maps uid to [offset, length, type, name]. If the index is missing or out of date,
+    it is rebuilt by scanning the corpus. The corpus is memory mapped, and documents
+    are parsed from a copy of just their slice of the map (so reading one document
+    does not read the whole file)."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        # (empty files cannot be mapped)
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.index = None
+        if os.path.exists(_index_name(filename)):
+            with open(_index_name(filename)) as f:
+                index = json.load(f)
+            if not index['source_key'].endswith(SERIAL_VERSION):
+                raise ValueError(f"Corpus written with unsupported {index['source_key']}")
+            if index['size'] == size:
+                self.index = index['documents']
+        if self.index is None:
+            self.index = {}
+            for offset, length, content in self.__lines():
+                uid, type_key, name, version = _summary(content)
+                self.index[uid] = [offset, length, type_key, name]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __lines(self):
+        """ Yield offset, length and content for every line in the corpus"""
+        start = 0
+        while start < len(self.buffer):
+            end = self.buffer.find(b'\n', start)
+            if end < 0:
+                end = len(self.buffer)
+            if end > start:
+                yield start, end - start, self.__parse(start, end - start)
+            start = end + 1
+
+    def __parse(self, offset, length):
+        """ Parse the content at offset, reading only that slice of the map """
+        with memoryview(self.buffer) as view:
+            return _loads(view[offset:offset + length])
+
+    def __contains__(self, uid):
+        return uid in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def scan(self):
+        """ Iterate over all the encoded content in the corpus (including superseded
+        versions of documents), in the order written. """
+        for offset, length, content in self.__lines():
+            yield content
+
+    def get(self, uid):
+        """ Return the encoded document with uid (raising KeyError if not present)"""
+        if uid not in self.index:
+            raise KeyError(f'No document {uid} in corpus')
+        offset, length = self.index[uid][0:2]
+        return self.__parse(offset, length)
+
+    def decode(self, factory, uid, lazy=False):
+        """ Return the document with a given uid as an osl instance """
+        return osl_decode(factory, self.get(uid), lazy)
+
+    def find(self, type_key=None, name=None):
+        """ Return the uids of all documents of a given type and/or name.
+        The type key may be a package.klass or a complete type key."""
+        return [uid for uid, (o, l, t, n) in self.index.items()
+                if _type_matches(t, type_key) and (name is None or n == name)]
+
+    def close(self):
+        if self.buffer:
+            self.buffer.close()
+        self.file.close()
@@ -1,5 +1,7 @@
 import json
 
+from pyosl import PropertyDescriptor
+from pyosl.diagnostics import logger
 from .osl_encoder import SERIAL_VERSION
 
 
@@ -9,7 +11,7 @@ def check_target_understood(key):
     return key
 
 
-def _decode(factory, content, klass):
+def _decode(factory, content, klass, lazy=False):
     """ Decode json content into a python instance of that content"""
 
     instance = factory.build(klass)
@@ -18,20 +20,18 @@ def _decode(factory, content, klass):
       
         if isinstance(value, dict):
             if name == '_meta':
-                metav = _decode(factory, value, 'shared.doc_meta_info')
+                metav = _decode(factory, value, 'shared.doc_meta_info', lazy)
                 setattr(instance, name, metav)
+            elif lazy and _defer(instance, name, value, lambda v: osl_decode(factory, v, True)):
+                continue
             else:
-                newv = osl_decode(factory, value)
+                newv = osl_decode(factory, value, lazy)
                 setattr(instance, name, newv)
                
         elif isinstance(value, list):
-            alist = []
-            for v in value:
-                if isinstance(v, dict):
-                    alist.append(osl_decode(factory, v))
-                else:
-                    alist.append(v)
-            setattr(instance, name, alist)
+            if lazy and _defer(instance, name, value, lambda v: _decode_list(factory, v, True)):
+                continue
+            setattr(instance, name, _decode_list(factory, value, lazy))
         else:
             if instance._osl.type_key == 'cim.2.shared.doc_reference':
                 if name == 'type':
@@ -40,25 +40,58 @@ def _decode(factory, content, klass):
     return instance
 
 
-def osl_decode(factory, json_dict):
-    """ Decodes json esdoc content into a pyosl instance"""
+def _decode_list(factory, value, lazy=False):
+    """ Decode the members of a json list """
+    alist = []
+    for v in value:
+        if isinstance(v, dict):
+            alist.append(osl_decode(factory, v, lazy))
+        else:
+            alist.append(v)
+    return alist
+
+
+def _defer(instance, name, value, decoder):
+    """ Leave value undecoded in the property name of instance until first accessed.
+    Returns False if that is not possible (it isn't an ontology property)"""
+    descriptor = type(instance).__dict__.get(name)
+    if isinstance(descriptor, PropertyDescriptor):
+        descriptor.defer(instance, value, decoder)
+        return True
+    return False
+
+
+def osl_decode(factory, json_dict, lazy=False):
+    """ Decodes json esdoc content into a pyosl instance. If lazy, nested osl content
+    is left undecoded until first accessed (when it is decoded and validated)."""
 
     try:
         doc_type = json_dict['_meta']['type']
     except KeyError:
-        print(json_dict)
+        logger.error(f'No type key in {json_dict}')
         raise KeyError('Document has invalid type key.')
 
-    return _decode(factory, json_dict, doc_type)
+    return _decode(factory, json_dict, doc_type, lazy)
+
+
+def _loads(json_content):
+    """ Parse json from a str, bytes, or any other buffer (memoryview, mmap, ...).
+    The json parser needs bytes (which it decodes to str itself), so a buffer is
+    copied, but only the bytes it exposes (so a slice of a memory mapped file copies
+    only that slice, and the rest of the file is never read)."""
+    if not isinstance(json_content, (str, bytes, bytearray)):
+        with memoryview(json_content) as view:
+            json_content = view.tobytes()
+    return json.loads(json_content)
 
 
-def osl_decode_json(factory, json_content):
-    """ Decodes osl data encoded """
-    json_dict = json.loads(json_content)
+def osl_decode_json(factory, json_content, lazy=False):
+    """ Decodes osl data encoded as json in a str, bytes, memoryview or mmap """
+    json_dict = _loads(json_content)
     assert '_meta' in json_dict
     assert 'source_key' in json_dict['_meta']
     assert json_dict['_meta']['source_key'].endswith(SERIAL_VERSION)
-    return osl_decode(factory, json_dict)
+    return osl_decode(factory, json_dict, lazy)
 
 
 
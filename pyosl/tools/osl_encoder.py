@@ -1,6 +1,8 @@
+import hashlib
 import json
 
 from pyosl import Property
+from pyosl.diagnostics import diagnose
 from .osl_tools import get_reference_for
 
 
@@ -18,23 +20,128 @@ def _is_encodable_attribute(name):
         return True
 
 
-def osl_encode(doc, shard_to_bundle=False):
+class Projection:
+    """ Selects the attributes to encode, so that encoding only touches those. Either
+    a collection of attribute paths relative to the instance being encoded (e.g. 'name',
+    '_meta.uid' or 'responsible_parties.role'), where a path selects everything below it,
+    or a dictionary mapping classes (package.klass) to the attributes to encode for
+    instances of that class, wherever they are (other classes are encoded in full).
+    Document types are always encoded, so projected content can still be decoded."""
+
+    def __init__(self, spec):
+        self.by_class = isinstance(spec, dict)
+        self.children = {}
+        if self.by_class:
+            self.spec = {k: set(v) for k, v in spec.items()}
+        else:
+            # a tree of attribute names, where None means everything below
+            self.spec = {}
+            for path in spec:
+                node = self.spec
+                *parents, last = path.split('.')
+                for name in parents:
+                    if name in node and node[name] is None:
+                        break
+                    node = node.setdefault(name, {})
+                else:
+                    node[last] = None
+
+    def fields(self, klass):
+        """ The attributes to encode for an instance of klass (None if all of them) """
+        if self.by_class:
+            return self.spec.get(klass)
+        return self.spec
+
+    def child(self, key):
+        """ The projection for the value of attribute key (None if all of it) """
+        if self.by_class:
+            return self
+        if self.spec[key] is None:
+            return None
+        if key not in self.children:
+            # (reused, so that it identifies the projection in the encoding memo)
+            self.children[key] = Projection(())
+            self.children[key].spec = self.spec[key]
+        return self.children[key]
+
+
+def _projection(projection):
+    """ Return a Projection (or None) from any of the forms accepted by the encoders """
+    if projection is None or isinstance(projection, Projection):
+        return projection
+    return Projection(projection)
+
+
+def osl_encode(doc, shard_to_bundle=False, bundled=None, projection=None):
     """Encodes an osl instance (whether a full doc, or a part there-of).
+    Sub-objects which are shared within doc are only encoded once, and the
+    encoded content reused (so shared content is also shared in the output:
+    the same dictionary appears wherever it occurs, so copy it before modifying it).
+    Documents which refer back to themselves are encoded as references at the
+    point of recursion, other reference cycles raise a ValueError.
     :param doc: Content being encoded.
     :type doc: osl object
+    :param shard_to_bundle: If True, replace documents by references, and return them in the bundle.
+    :param bundled: Optional set of document uids already in the bundle. When sharding,
+        documents already present are replaced by references without being encoded again,
+        and the uids of those which are encoded are added to it.
+    :param projection: Optional Projection (or specification of one) limiting the
+        attributes encoded. Cannot be used when sharding.
     :returns: An encoded document representation.
     :rtype: dict
     """
+    if projection is not None and shard_to_bundle:
+        raise ValueError('Cannot project content which is being sharded to a bundle')
+    return _encode(doc, shard_to_bundle, bundled, {}, {}, _projection(projection))
+
+
+def _value(entity):
+    if isinstance(entity, Property):
+        return entity.value
+    else:
+        return entity
+
+
+def _encode(doc, shard_to_bundle, bundled, memo, active, projection=None):
+    """ Implements osl_encode, with memo (encoded content keyed by the identity of
+    instances already encoded, and of the projection used) and active (instances
+    currently being encoded)."""
+
+    memo_key = (id(doc), id(projection))
+    if memo_key in memo:
+        diagnose('shared', doc.__class__.__name__)
+        # any documents were returned the first time round
+        return memo[memo_key], []
+
+    if id(doc) in active:
+        diagnose('cycle', doc.__class__.__name__)
+        if doc._osl.is_document:
+            obj, ignore = _encode(get_reference_for(doc), False, None, {}, {})
+            return obj, []
+        path = list(active.values())[list(active).index(id(doc)):]
+        path = ' -> '.join([a.__class__.__name__ for a in path])
+        raise ValueError(f'Reference cycle encoding {path} -> {doc.__class__.__name__}')
+
     obj = dict()
     bundle = []
 
-    def _value(entity):
-        if isinstance(entity, Property):
-            return entity.value
-        else:
-            return entity
+    if shard_to_bundle and bundled is not None and doc._osl.is_document:
+        uid = doc._meta.uid
+        if uid in bundled:
+            obj, ignore = _encode(get_reference_for(doc), False, None, {}, {})
+            return obj, bundle
+        elif uid:
+            bundled.add(uid)
 
-    for key, val in doc.__dict__.items():
+    active[id(doc)] = doc
+
+    fields = projection.fields(doc.__class__.__name__) if projection else None
+    if fields is None:
+        items = list(doc.__dict__.items())
+    else:
+        items = [(k, v) for k, v in doc.__dict__.items() if k in fields]
+
+    for key, val in items:
         # Escape private/magic properties, except for the osl private metadata which we do want to encode
         if not _is_encodable_attribute(key):
             continue
@@ -49,9 +156,9 @@ def osl_encode(doc, shard_to_bundle=False):
             # ... osl types
 
             if hasattr(val, '_osl'):
-                obj[key], docs = osl_encode(val, shard_to_bundle)
-                if docs:
-                    bundle += docs
+                obj[key], docs = _encode(val, shard_to_bundle, bundled, memo, active,
+                                         projection.child(key) if projection else None)
+                bundle += docs
               
             # ... simple types;
             elif val is not None:
@@ -65,50 +172,104 @@ def osl_encode(doc, shard_to_bundle=False):
                     obj[key] = val
                 # ... collections;
                 else:
-                    results = [osl_encode(i) if hasattr(i, '_osl') else i for i in [_value(j) for j in val]]
                     obj[key] = []
-                    for r in results:
-                        if len(r) == 0:
-                            # not a pyosl type
-                            obj[key].append(r)
-                        else:
+                    for i in [_value(j) for j in val]:
+                        if hasattr(i, '_osl'):
                             # pyosl type, if sharded, did we get documents?
-                            obj[key].append(r[0])
-                            if r[1]:
-                                bundle.append(r)
+                            content, docs = _encode(i, shard_to_bundle, bundled, memo, active,
+                                                    projection.child(key) if projection else None)
+                            obj[key].append(content)
+                            bundle += docs
+                        else:
+                            obj[key].append(i)
+
+    del active[id(doc)]
 
     # Inject type info to simplify decoding.
     # We could use _osl, but that would be excessive duplication in output.
     klass = doc.__class__.__name__
     if klass != "shared.doc_meta_info":
-        if '_meta' not in obj:
-            obj['_meta'] = {}
+        # (copied, since the encoded metadata may be memoised and shared)
+        obj['_meta'] = dict(obj.get('_meta', {}))
         obj['_meta']['type'] = doc._osl.type_key
         obj['_meta']['source_key'] = SERIAL_VERSION
 
     if doc._osl.is_document and shard_to_bundle:
         bundle = [obj,] + bundle
         dr_obj = get_reference_for(doc)
-        obj, ignore = osl_encode(dr_obj, False)
+        obj, ignore = _encode(dr_obj, False, None, {}, {})
 
+    memo[memo_key] = obj
     return obj, bundle
 
 
-def osl_encode2json(obj):
-    """ Given an instance of an OSL document, encode into json. Optionally """
+def osl_encode2json(obj, canonical=False, projection=None, cache=None):
+    """ Given an instance of an OSL document, encode into json. Optionally
+    use the canonical form (see canonical_json), and/or a projection (see osl_encode).
+    If an EncodingCache is provided, use it (projections are never cached). """
+
+    if cache is not None and projection is None:
+        return cache.encode(obj, 'canonical' if canonical else 'json')
 
-    content, bundle = osl_encode(obj, False)
+    content, bundle = osl_encode(obj, False, projection=projection)
     # encoding should not bundle!
     assert bundle == []
 
+    if canonical:
+        return canonical_json(content)
     return json.dumps(content)
 
 
-def bundle_instance(obj):
-    """ Given an object, crack into constituent documents and encode those into a bundle."""
+# Document metadata which changes when a document is re-saved, rather than when it is changed.
+VOLATILE_META = ('create_date', 'update_date', 'version')
+
+
+def _canonical(content, ignore_meta):
+    """ Normalise encoded content for canonical_json """
+    if isinstance(content, dict):
+        obj = {k: _canonical(v, ignore_meta) for k, v in content.items()}
+        if '_meta' in obj:
+            obj['_meta'] = {k: v for k, v in obj['_meta'].items() if k not in ignore_meta}
+        return obj
+    elif isinstance(content, list):
+        return [_canonical(v, ignore_meta) for v in content]
+    elif isinstance(content, float) and content == 0.0:
+        # no negative zeros
+        return 0.0
+    return content
+
+
+def canonical_json(content, ignore_meta=()):
+    """ Serialise osl encoded content (or an osl instance) into a canonical json string,
+    which depends only on the content, and not on the order in which attributes were set.
+    Keys are sorted, there is no insignificant white space, floats use their shortest
+    representation (without negative zeros), and non-finite floats are not allowed.
+    :param content: osl encoded content, or an osl instance
+    :param ignore_meta: keys to leave out of the _meta of any (nested) documents
+    :returns: json string
+    """
+    if hasattr(content, '_osl'):
+        content, bundle = osl_encode(content)
+    return json.dumps(_canonical(content, ignore_meta), sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False, allow_nan=False)
+
+
+def content_hash(doc, ignore_meta=VOLATILE_META):
+    """ Return a (sha256) hash of the canonical json form of a document (or encoded content).
+    By default the volatile metadata (dates and version) do not contribute, so that
+    the hash only changes when the content does. """
+    return hashlib.sha256(canonical_json(doc, ignore_meta).encode('utf-8')).hexdigest()
+
+
+def bundle_instance(obj, cache=None):
+    """ Given an object, crack into constituent documents and encode those into a bundle.
+    If an EncodingCache is provided, use it."""
+
+    if cache is not None:
+        return cache.encode(obj, 'bundle')
 
-    content, contents = osl_encode(obj, True)
-    # should be a bunch of documents, not just one.
+    content, contents = osl_encode(obj, True, set())
+    # should be a bunch of documents, not just one, each only once.
     bundle = [json.dumps(c) for c in contents]
     return bundle
 
@@ -0,0 +1,157 @@
+# An in-process index of exported triples, with simple pattern matching queries.
+
+from rdflib.term import Identifier, Variable
+
+
+def is_variable(term):
+    """ Variables are rdflib Variables, or (plain) strings starting with ? """
+    if isinstance(term, Variable):
+        return True
+    return isinstance(term, str) and not isinstance(term, Identifier) and term.startswith('?')
+
+
+def _name(variable):
+    return str(variable).lstrip('?')
+
+
+def _add(index, a, b, c):
+    index.setdefault(a, {}).setdefault(b, set()).add(c)
+
+
+def _discard(index, a, b, c):
+    inner = index.get(a)
+    if inner is not None and b in inner:
+        inner[b].discard(c)
+        if not inner[b]:
+            del inner[b]
+            if not inner:
+                del index[a]
+
+
+class TripleIndex:
+    """ Triples held in SPO, POS and OSP hash indexes, so that any pattern with at least
+    one term bound is answered without scanning. Works with the plain string triples of
+    Triples and the rdflib triples of Triples2 (but don't mix them in one index)."""
+
+    def __init__(self, source=None):
+        self.spo, self.pos, self.osp = {}, {}, {}
+        self.size = 0
+        if source is not None:
+            self.update(source)
+
+    def add(self, triple):
+        """ Add one triple """
+        s, p, o = triple
+        if o in self.spo.get(s, {}).get(p, ()):
+            return
+        _add(self.spo, s, p, o)
+        _add(self.pos, p, o, s)
+        _add(self.osp, o, s, p)
+        self.size += 1
+
+    def remove(self, triple):
+        """ Remove one triple (if present) """
+        s, p, o = triple
+        if o not in self.spo.get(s, {}).get(p, ()):
+            return
+        _discard(self.spo, s, p, o)
+        _discard(self.pos, p, o, s)
+        _discard(self.osp, o, s, p)
+        self.size -= 1
+
+    def update(self, source):
+        """ Add triples from a CoreRDF exporter (Triples, Triples2), or any iterable of triples """
+        if hasattr(source, 'triples') and not callable(source.triples):
+            source = source.triples
+        elif hasattr(source, 'g'):
+            source = source.g
+        for triple in source:
+            self.add(triple)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, triple):
+        s, p, o = triple
+        return o in self.spo.get(s, {}).get(p, ())
+
+    def __iter__(self):
+        return self.triples((None, None, None))
+
+    def triples(self, pattern):
+        """ Yield the triples matching pattern, a triple where None matches anything """
+        s, p, o = pattern
+        if s is not None:
+            if p is not None:
+                objects = self.spo.get(s, {}).get(p, ())
+                if o is not None:
+                    if o in objects:
+                        yield s, p, o
+                else:
+                    for obj in objects:
+                        yield s, p, obj
+            elif o is not None:
+                for pred in self.osp.get(o, {}).get(s, ()):
+                    yield s, pred, o
+            else:
+                for pred, objects in self.spo.get(s, {}).items():
+                    for obj in objects:
+                        yield s, pred, obj
+        elif p is not None:
+            if o is not None:
+                for subj in self.pos.get(p, {}).get(o, ()):
+                    yield subj, p, o
+            else:
+                for obj, subjects in self.pos.get(p, {}).items():
+                    for subj in subjects:
+                        yield subj, p, obj
+        elif o is not None:
+            for subj, predicates in self.osp.get(o, {}).items():
+                for pred in predicates:
+                    yield subj, pred, o
+        else:
+            for subj, predicates in self.spo.items():
+                for pred, objects in predicates.items():
+                    for obj in objects:
+                        yield subj, pred, obj
+
+    def query(self, patterns):
+        """ Return the list of variable bindings (dictionaries keyed by variable name, without
+        the ?) which satisfy all the patterns, triples whose terms may be variables (e.g. '?doc').
+        Patterns are evaluated most selective first, joining on shared variables.
+        """
+        patterns = list(patterns)
+        for pattern in patterns:
+            if len(pattern) != 3:
+                raise ValueError(f'Query patterns must be triples, not {pattern}')
+        return list(self.__solve(patterns, {}))
+
+    def __solve(self, patterns, binding):
+        if not patterns:
+            yield dict(binding)
+            return
+        # next, the pattern with fewest unbound terms
+        resolved = [tuple(binding.get(_name(t), None) if is_variable(t) else t for t in pattern)
+                    for pattern in patterns]
+        best = min(range(len(patterns)), key=lambda i: resolved[i].count(None))
+        pattern, rest = patterns[best], patterns[:best] + patterns[best + 1:]
+        for triple in self.triples(resolved[best]):
+            extended = dict(binding)
+            consistent = True
+            for term, value in zip(pattern, triple):
+                if is_variable(term):
+                    name = _name(term)
+                    if extended.setdefault(name, value) != value:
+                        # the same variable twice in one pattern
+                        consistent = False
+                        break
+            if consistent:
+                yield from self.__solve(rest, extended)
+
+    def subjects(self, predicate=None, obj=None):
+        """ The distinct subjects of triples with a given predicate and/or object """
+        return {s for s, p, o in self.triples((None, predicate, obj))}
+
+    def referencing(self, target):
+        """ The distinct subjects which refer (directly) to target """
+        return set(self.osp.get(target, {}))
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import zlib
+
+
+class OntologyTables:
+    """ A flattened, class level, view of an ontology, for tools which work directly on
+    serialised content and so need the ontology definitions without building instances."""
+
+    def __init__(self, ontology):
+        """ Initialise from an ontology (normally Factory.ontology) """
+
+        self.name, self.version = ontology.name, ontology.version
+        self.builtins = ontology.builtins
+
+        # Sorted so that the numeric identifiers below are stable for a given ontology.
+        self.klasses = sorted(ontology.klasses)
+        self.klass_ids = {k: i for i, k in enumerate(self.klasses)}
+        self.type_keys = {k: ontology.klasses[k]._osl.type_key for k in self.klasses}
+        self.by_type_key = {v: k for k, v in self.type_keys.items()}
+
+        self.properties = {}
+        self.property_names = {}
+        self.property_ids = {}
+        self.members = {}
+        self.member_ids = {}
+        self.is_open = {}
+        self.is_document = {}
+        self.is_abstract = {}
+        self.bases = {}
+
+        for k in self.klasses:
+            meta = ontology.klasses[k]._osl
+            self.bases[k] = meta.base_hierarchy
+            self.is_document[k] = meta.is_document
+            self.is_abstract[k] = getattr(meta, 'is_abstract', False)
+            if meta.type == 'enum':
+                self.members[k] = [m[0] for m in meta.members]
+                self.member_ids[k] = {m: i for i, m in enumerate(self.members[k])}
+                self.is_open[k] = meta.is_open
+            else:
+                # base class properties may be redefined in the class itself
+                properties = OrderedDict()
+                for p in meta.inherited_properties + meta.properties:
+                    properties[p[0]] = (p[1], p[2])
+                self.properties[k] = properties
+                self.property_names[k] = sorted(properties)
+                self.property_ids[k] = {p: i for i, p in enumerate(self.property_names[k])}
+
+        self.fingerprint = self.__fingerprint()
+
+    def __fingerprint(self):
+        """ A checksum of everything which contributes to numeric identifiers """
+        content = [self.name, self.version]
+        for k in self.klasses:
+            content.append(k)
+            content += self.property_names.get(k, self.members.get(k))
+        return zlib.crc32('\n'.join(content).encode('utf-8'))
+
+    def klass_for(self, type_key):
+        """ Return the package.klass for a serialised type key, or None if not recognised """
+        if type_key in self.by_type_key:
+            return self.by_type_key[type_key]
+        if type_key in self.klass_ids:
+            return type_key
+        return None
+
+    def is_enum(self, klass):
+        """ True if klass is an enumeration """
+        return klass in self.members
+
+    def is_a(self, klass, target):
+        """ True if klass is target, or a subclass of target """
+        return klass == target or target in self.bases.get(klass, [])
+
+
+_TABLES = {}
+
+
+def ontology_tables(ontology):
+    """ Return the (cached) tables for an ontology """
+    key = id(ontology)
+    if key not in _TABLES or _TABLES[key][0] is not ontology:
+        _TABLES[key] = (ontology, OntologyTables(ontology))
+    return _TABLES[key][1]
+
+
+def target_klass(target):
+    """ Strip any linked_to stereotype from a property target """
+    if target.startswith('linked_to'):
+        return target[10:-1]
+    return target
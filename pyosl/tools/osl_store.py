@@ -0,0 +1,247 @@
+# Local stores of osl encoded documents, indexed by uid, type and name, and
+# a resolver which turns doc_references into the documents they refer to.
+
+from collections import OrderedDict
+from pathlib import Path
+import json
+import sqlite3
+
+from .osl_encoder import osl_encode
+from .osl_decoder import osl_decode
+
+
+class LRUCache:
+    """ A minimal size bounded least recently used cache """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits, self.misses = 0, 0
+
+    def get(self, key, default=None):
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """ Add value, returning the (key, value) evicted to make room, if any """
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            return self.data.popitem(last=False)
+        return None
+
+    def invalidate(self, key):
+        self.data.pop(key, None)
+
+    def clear(self):
+        self.data.clear()
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+
+def _summary(content):
+    """ Return the index entry for an encoded document """
+    meta = content['_meta']
+    if not meta.get('uid'):
+        raise ValueError('Cannot store a document with no uid')
+    return meta['uid'], meta['type'], content.get('name'), meta.get('version')
+
+
+def _bare_key(type_key):
+    """ The package.klass of a full type key (cim.2.package.klass) """
+    return '.'.join(type_key.split('.')[-2:])
+
+
+def _type_matches(stored, type_key):
+    """ Match a full type key (cim.2.package.klass) against either form of type key"""
+    return type_key is None or stored == type_key or stored.endswith('.' + type_key)
+
+
+class DocumentStore:
+    """ Interface for local document stores, holding osl encoded documents. """
+
+    def add(self, document):
+        """ Add (or replace) a document, which may be an osl instance or encoded content.
+        Returns the document uid."""
+        if hasattr(document, '_osl'):
+            if not document._osl.is_document:
+                raise ValueError(f'Not-a-Document: Cannot store {document}')
+            document, ignore = osl_encode(document)
+        return self._add(document, *_summary(document))
+
+    def _add(self, content, uid, type_key, name, version):
+        # Must be implemented by sub-classes
+        raise NotImplementedError
+
+    def get(self, uid):
+        """ Return the encoded document with uid (raising KeyError if not present)"""
+        raise NotImplementedError
+
+    def find(self, type_key=None, name=None):
+        """ Return the uids of all documents of a given type and/or name.
+        The type key may be a package.klass or a complete type key."""
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        pass
+
+
+class FileStore(DocumentStore):
+    """ Documents held as one json file each in a directory, with an index file. """
+
+    INDEX = 'index.json'
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index = self.directory / self.INDEX
+        if index.exists():
+            with index.open() as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+            for docfile in self.directory.glob('*.json'):
+                with docfile.open() as f:
+                    uid, type_key, name, version = _summary(json.load(f))
+                self.index[uid] = [type_key, name, version]
+        self.modified = False
+
+    def _path(self, uid):
+        """ The file holding document uid, which must be a plain filename within the directory """
+        filename = f'{uid}.json'
+        if not uid or uid.startswith('.') or filename == self.INDEX or any(c in uid for c in '/\\\0'):
+            raise ValueError(f'Document uid {uid!r} cannot be used as a filename')
+        return self.directory / filename
+
+    def _add(self, content, uid, type_key, name, version):
+        with self._path(uid).open('w') as f:
+            json.dump(content, f)
+        self.index[uid] = [type_key, name, version]
+        self.modified = True
+        return uid
+
+    def get(self, uid):
+        if uid not in self.index:
+            raise KeyError(f'No document {uid} in store')
+        with self._path(uid).open() as f:
+            return json.load(f)
+
+    def find(self, type_key=None, name=None):
+        return [uid for uid, (t, n, v) in self.index.items()
+                if _type_matches(t, type_key) and (name is None or n == name)]
+
+    def __contains__(self, uid):
+        return uid in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def flush(self):
+        """ Write the index """
+        if self.modified:
+            with (self.directory / self.INDEX).open('w') as f:
+                json.dump(self.index, f)
+            self.modified = False
+
+    def close(self):
+        self.flush()
+
+
+class SQLiteStore(DocumentStore):
+    """ Documents held in an SQLite database, with indexes on type and name """
+
+    def __init__(self, filename):
+        self.db = sqlite3.connect(str(filename))
+        self.db.execute('CREATE TABLE IF NOT EXISTS documents '
+                        '(uid TEXT PRIMARY KEY, type TEXT, name TEXT, version INTEGER, content TEXT, klass TEXT)')
+        columns = [row[1] for row in self.db.execute('PRAGMA table_info(documents)')]
+        if 'klass' not in columns:
+            # a store written before the package.klass was indexed
+            self.db.execute('ALTER TABLE documents ADD COLUMN klass TEXT')
+            self.db.executemany('UPDATE documents SET klass = ? WHERE uid = ?',
+                                [(_bare_key(t), uid) for uid, t in self.db.execute('SELECT uid, type FROM documents')])
+        self.db.execute('CREATE INDEX IF NOT EXISTS documents_type ON documents (type)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS documents_klass ON documents (klass)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS documents_name ON documents (name)')
+
+    def _add(self, content, uid, type_key, name, version):
+        self.db.execute('INSERT OR REPLACE INTO documents (uid, type, name, version, content, klass) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (uid, type_key, name, version, json.dumps(content), _bare_key(type_key)))
+        return uid
+
+    def get(self, uid):
+        row = self.db.execute('SELECT content FROM documents WHERE uid = ?', (uid,)).fetchone()
+        if row is None:
+            raise KeyError(f'No document {uid} in store')
+        return json.loads(row[0])
+
+    def find(self, type_key=None, name=None):
+        query, args = 'SELECT uid FROM documents WHERE 1', []
+        if type_key is not None:
+            # either a full type key, or a package.klass (both indexed)
+            query += ' AND (type = ? OR klass = ?)'
+            args += [type_key, type_key]
+        if name is not None:
+            query += ' AND name = ?'
+            args.append(name)
+        return [row[0] for row in self.db.execute(query, args)]
+
+    def __contains__(self, uid):
+        return self.db.execute('SELECT 1 FROM documents WHERE uid = ?', (uid,)).fetchone() is not None
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def flush(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+class DocumentResolver:
+    """ Resolves doc_references to documents from a store, holding the most recently
+    used documents in a bounded cache. Note that repeated resolution of the same
+    reference will return the same (cached) instance."""
+
+    def __init__(self, store, factory, maxsize=128):
+        self.store = store
+        self.factory = factory
+        self.cache = LRUCache(maxsize)
+
+    def resolve(self, reference):
+        """ Return the document for a doc_reference (or uid) """
+        if isinstance(reference, str):
+            uid, type_key = reference, None
+        else:
+            uid, type_key = reference.id, reference.type
+        document = self.cache.get(uid)
+        if document is None:
+            document = osl_decode(self.factory, self.store.get(uid))
+            self.cache.put(uid, document)
+        if type_key and not _type_matches(document._osl.type_key, type_key):
+            raise ValueError(f'Reference to {type_key} resolves to a {document._osl.type_key}')
+        return document
+
+    def invalidate(self, uid=None):
+        """ Forget a cached document (or all of them) """
+        if uid is None:
+            self.cache.clear()
+        else:
+            self.cache.invalidate(uid)
@@ -1,15 +1,19 @@
 import json
+import re
+import sqlite3
 
 from . osl_encoder import _is_encodable_attribute
 from . osl_tools import get_reference_for
-from . osl_encoder import SERIAL_VERSION
-from pyosl import Property
+from . osl_encoder import SERIAL_VERSION, content_hash, _encode
+from . osl_schema import ontology_tables
+from pyosl import Property, Factory
+from pyosl.diagnostics import diagnose
 import uuid
 from requests.utils import requote_uri
 from rdflib import Graph, URIRef, RDF, BNode, Literal
+from collections import OrderedDict
 
 NAMESPACE = 'http://esdoc-org/osl'
-DEBUG = True
 
 MAPPING = {
     str: 'http://www.w3.org/2001/XMLSchema#string',
@@ -27,9 +31,64 @@ def _getval_if_exists_and_set(instance, attribute):
         return None
 
 
+# Names which requote_uri would leave alone (no % escapes, nothing to quote)
+_UNQUOTED = re.compile(r"[A-Za-z0-9\-._~!#$&'()*+,/:;=?@\[\]]*\Z")
+
+# The quoted namespace for each klass
+_NAME_PREFIX = {}
+
+# Literal suffixes for each builtin type
+_LITERAL_SUFFIX = {k: f'^^{v}' for k, v in MAPPING.items()}
+
+
 def _make_name(k, v):
     """ Create a fully qualified name given klass k, and name v"""
-    return requote_uri(f'{NAMESPACE}/{k}/{v}')
+    if k not in _NAME_PREFIX:
+        _NAME_PREFIX[k] = requote_uri(f'{NAMESPACE}/{k}/')
+    v = str(v)
+    if _UNQUOTED.match(v):
+        return _NAME_PREFIX[k] + v
+    return _NAME_PREFIX[k] + requote_uri(v)
+
+
+class RDFTables:
+    """ Interned RDF terms for the classes and properties of an ontology, built once
+    rather than for every instance and property exported."""
+
+    def __init__(self, ontology, type_space):
+        tables = ontology_tables(ontology)
+        self.type_space = type_space
+        self.klasses = {k: URIRef(type_space + k) for k in tables.klasses}
+        self.predicates = {(k, p): URIRef(f'{type_space}{k}/{p}')
+                           for k, properties in tables.properties.items() for p in properties}
+
+    def klass(self, klass):
+        """ The URIRef for klass """
+        try:
+            return self.klasses[klass]
+        except KeyError:
+            ref = self.klasses[klass] = URIRef(self.type_space + klass)
+            return ref
+
+    def predicate(self, klass, key):
+        """ The URIRef for the property key of klass """
+        try:
+            return self.predicates[(klass, key)]
+        except KeyError:
+            # Not an ontology property (e.g. _meta)
+            ref = self.predicates[(klass, key)] = URIRef(f'{self.type_space}{klass}/{key}')
+            return ref
+
+
+_RDF_TABLES = {}
+
+
+def rdf_tables(ontology, type_space):
+    """ Return the (cached) RDF tables for an ontology and type space """
+    key = (id(ontology), type_space)
+    if key not in _RDF_TABLES or _RDF_TABLES[key][0] is not ontology:
+        _RDF_TABLES[key] = (ontology, RDFTables(ontology, type_space))
+    return _RDF_TABLES[key][1]
 
 
 def _value(entity):
@@ -42,20 +101,36 @@ def _value(entity):
 class CoreRDF:
     """ Mixin interface class for core RDF functionality for one graph."""
 
-    def __init__(self):
+    def __init__(self, deterministic=False):
         """
         Instantiate an RDF Graph or repository
-        :param instance: An initial pyosl instance to be serialised as RDF.
+        :param deterministic: If True, blank nodes are named from their path from the
+            nearest named node (or the content of the instance added, if that has no name),
+            so that exporting the same content again gives the same graph. Otherwise
+            they are named randomly.
         """
 
         # External entities (documents via doc_reference, and online resources)
         self.online_resources = {}  # keyed by linkage
         self.documents_referenced = {}  # keyed by id
+        self.deterministic = deterministic
+
+    def _blank_id(self, path):
+        """ Return an identifier for a blank node at path (which is only used if deterministic)"""
+        if self.deterministic:
+            return uuid.uuid5(uuid.NAMESPACE_URL, path)
+        return uuid.uuid4()
+
+    def _root_path(self, instance):
+        """ The path of an instance which is added, but has no name """
+        if self.deterministic:
+            return content_hash(instance)
+        return None
 
     @property
     def external_esdoc_references(self):
         """A list of tuples of the form target (id, name, relationship)"""
-        return [(v.id, v.name, v.relationship) for v in self.documents_referenced.keys()]
+        return [(v.id, v.name, v.relationship) for v in self.documents_referenced.values()]
 
     @property
     def external_resources(self):
@@ -96,9 +171,20 @@ class CoreRDF:
         :param instance:
         :return: references: a list of URIS for esdoc entities which are linked to this instance.
         """
+        return self._add_instance(instance, {}, None)
+
+    def _add_instance(self, instance, memo, path):
+        """ Implements add_instance, with memo holding the names of the instances already
+        added (keyed by identity), so that shared instances are only added once, and
+        cyclic references simply refer to the node already named. Path is the path
+        of the instance from the nearest named node."""
 
         klass = instance.__class__.__name__
-        if klass == 'shared.doc_reference':
+        if id(instance) in memo:
+            diagnose('shared', klass)
+            return memo[id(instance)]
+
+        if klass in ('shared.doc_reference', 'shared.online_resource'):
             self._collect_external(instance)
         name = None
         for key in ('uid', 'id', 'name'):
@@ -109,9 +195,10 @@ class CoreRDF:
 
         if not name:
             # blank node then
-            name = f'_:{uuid.uuid4()}'
+            name = f'_:{self._blank_id(path or self._root_path(instance))}'
             self.add_triple((name, 'rdf:type', 'rdf:Bag'))
 
+        memo[id(instance)] = name
         self.add_triple((name, 'rdf:type', klass))
 
         if instance._osl.is_document:
@@ -132,7 +219,7 @@ class CoreRDF:
                 # ... osl types
 
                 if hasattr(val, '_osl'):
-                    target = self.add_instance(val)
+                    target = self._add_instance(val, memo, f'{name}/{key}')
                     self.add_triple((name, key, target))
 
                 # ... simple types;
@@ -148,13 +235,14 @@ class CoreRDF:
                     # ... collections;
                     else:
                         # Assume ordered, we can't know ...
-                        blank_name = f'_:{uuid.uuid4()}'
+                        blank_name = f'_:{self._blank_id(f"{name}/{key}")}'
                         self.add_triple((name, key, blank_name))
                         self.add_triple((blank_name, 'rdf:type', 'rdf:Seq'))
                         for n, v in enumerate([_value(j) for j in val]):
                             predicate = f'rdf:_{n}'
                             if hasattr(v, '_osl'):
-                                self.add_triple((blank_name, predicate, self.add_instance(v)))
+                                self.add_triple((blank_name, predicate,
+                                                 self._add_instance(v, memo, f'{name}/{key}/{n}')))
                             else:
                                 self.add_triple((blank_name, predicate, self._literal(v)))
 
@@ -164,7 +252,7 @@ class CoreRDF:
         """ Annotate builtin literals with datatypes."""
         key = type(v)
         if key in MAPPING:
-            return f'{v}^^{MAPPING[key]}'
+            return f'{v}{_LITERAL_SUFFIX[key]}'
         else:
             raise ValueError(f"Unexpected builtin type {key} ({v})")
 
@@ -172,12 +260,15 @@ class CoreRDF:
 class Triples (CoreRDF):
     """ Lightweight RDF encoder"""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, deterministic=False):
+        super().__init__(deterministic)
+        # the triples, in the order first added, with a set for de-duplication
         self.triples = []
-        
+        self._seen = set()
+
     def add_triple(self, triple):
-        if triple not in self.triples:
+        if triple not in self._seen:
+            self._seen.add(triple)
             self.triples.append(triple)
 
     def __repr__(self):
@@ -185,13 +276,124 @@ class Triples (CoreRDF):
         return '\n'.join([str(i) for i in self.triples])
 
 
+class SQLiteTriples(CoreRDF):
+    """ Triples, as Triples would produce them, held in an SQLite database (with
+    covering indexes for subject, predicate and object led queries), along with
+    the external entities referenced, so that exports can be appended to, and
+    queried, across runs."""
+
+    def __init__(self, filename, batch_size=10000, deterministic=False):
+        """
+        :param filename: the database file (created if necessary)
+        :param batch_size: the number of triples inserted in each transaction
+        :param deterministic: name blank nodes deterministically (see CoreRDF)
+        """
+        super().__init__(deterministic)
+        self.db = sqlite3.connect(str(filename))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS triples (s TEXT, p TEXT, o TEXT);
+            CREATE UNIQUE INDEX IF NOT EXISTS triples_spo ON triples (s, p, o);
+            CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+            CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p);
+            CREATE TABLE IF NOT EXISTS documents_referenced
+                (id TEXT PRIMARY KEY, name TEXT, relationship TEXT, type TEXT);
+            CREATE TABLE IF NOT EXISTS online_resources (linkage TEXT PRIMARY KEY, name TEXT);
+            """)
+        self.batch = []
+        self.batch_size = batch_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_triple(self, triple):
+        self.batch.append(triple)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def add_instance(self, instance):
+        name = super().add_instance(instance)
+        self.flush()
+        return name
+
+    def flush(self):
+        """ Insert (in one transaction) any triples not yet in the database """
+        if self.batch:
+            with self.db:
+                self.db.executemany('INSERT OR IGNORE INTO triples VALUES (?, ?, ?)', self.batch)
+            self.batch = []
+
+    def _collect_external(self, entity):
+        klass = entity.__class__.__name__
+        if klass == 'shared.doc_reference':
+            cursor = self.db.execute('INSERT OR IGNORE INTO documents_referenced VALUES (?, ?, ?, ?)',
+                                     (entity.id, entity.name, entity.relationship, entity.type))
+        elif klass == 'shared.online_resource':
+            cursor = self.db.execute('INSERT OR IGNORE INTO online_resources VALUES (?, ?)',
+                                     (entity.linkage, entity.name))
+        else:
+            return True
+        return cursor.rowcount == 1
+
+    @property
+    def external_esdoc_references(self):
+        """A list of tuples of the form target (id, name, relationship)"""
+        return self.db.execute('SELECT id, name, relationship FROM documents_referenced').fetchall()
+
+    @property
+    def external_resources(self):
+        """ A list of online resource linkages"""
+        return [row[0] for row in self.db.execute('SELECT linkage FROM online_resources')]
+
+    def triples(self, pattern=(None, None, None)):
+        """ Yield the triples matching pattern, a triple where None matches anything,
+        in the order they were first added"""
+        self.flush()
+        conditions = [f'{c} = ?' for c, v in zip('spo', pattern) if v is not None]
+        query = 'SELECT s, p, o FROM triples'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        yield from self.db.execute(query + ' ORDER BY rowid', [v for v in pattern if v is not None])
+
+    def __iter__(self):
+        return self.triples()
+
+    def __len__(self):
+        self.flush()
+        return self.db.execute('SELECT COUNT(*) FROM triples').fetchone()[0]
+
+    def __contains__(self, triple):
+        self.flush()
+        return self.db.execute('SELECT 1 FROM triples WHERE s = ? AND p = ? AND o = ?', triple).fetchone() is not None
+
+    def close(self):
+        self.flush()
+        self.db.commit()
+        self.db.close()
+
+    def __repr__(self):
+        return '\n'.join([str(i) for i in self.triples()])
+
+
 class Triples2(CoreRDF):
     """ RDF triples using rdflib for a triple store"""
-    def __init__(self, collect_semantic_triples=True, skip_meta=True):
+    LISTS = ('list', 'seq')
+
+    def __init__(self, collect_semantic_triples=True, skip_meta=True, deterministic=False, incremental=False,
+                 lists='list'):
         """ Initialise graph and list of internal linkages,
         optionally flag desire to collect semantic triples as well.
-        (semantic triples? for pyosl plotting)"""
-        super().__init__()
+        (semantic triples? for pyosl plotting)
+        Optionally name blank nodes deterministically (see CoreRDF).
+        If incremental, the triples contributed by each document (and external entity) are
+        recorded, keyed as in the objects table, so that documents can be updated.
+        Lists are encoded as rdf:List collections ('list') or as rdf:Seq containers ('seq')."""
+        super().__init__(deterministic)
+        if lists not in self.LISTS:
+            raise ValueError(f'Unknown RDF list encoding {lists}')
+        self.lists = lists
         self.g = Graph()
         self.resource_space = 'https://es-doc.org/resources/'
         self.type_space = 'https://es-doc.org/types/'
@@ -202,6 +404,16 @@ class Triples2(CoreRDF):
         self.semantic_triples = []
         self.go_semantic = collect_semantic_triples
         self.skip_meta=skip_meta
+        self._memo = {}
+        self.tables = rdf_tables(Factory.ontology, self.type_space)
+        self.incremental = incremental
+        self.subgraphs = {}
+        self.hashes = {}
+        self.references = {}  # key: the keys of the external entities it refers to
+        self.referrers = {}  # external entity key: the keys which refer to it
+        self._owner = None
+        self._refresh = False
+        self._digests, self._encodings, self._renewed = {}, {}, set()
 
     def _check_add_external(self, entity):
         """ Add an external entity if necessary"""
@@ -209,10 +421,15 @@ class Triples2(CoreRDF):
         assert klass in ["shared.doc_reference", "shared.online_resource"]
         key_name = {'shared.doc_reference': 'id', 'shared.online_resource': 'linkage'}
         key = getattr(entity, key_name[klass])
+        if key in self.objects and self._refresh and key not in self._renewed:
+            # updating, so describe it afresh (once)
+            self._drop(key)
         if key in self.objects:
             return True, self.objects[key][1]
         else:
             self.objects[key] = [entity, URIRef(key)]
+            if self._refresh:
+                self._renewed.add(key)
             if self.go_semantic:
                 self.semantic_nodes[klass].append(str(entity))
             return False, self.objects[key][1]
@@ -220,6 +437,23 @@ class Triples2(CoreRDF):
     def add_triple(self, triple):
         """" Need to encode triple using the proper RDFlib classes"""
         self.g.add(triple)
+        if self._owner is not None:
+            self.subgraphs[self._owner].add(triple)
+
+    def add_triples(self, triples):
+        """ Add a batch of triples in one insertion """
+        self.g.addN((s, p, o, self.g) for s, p, o in triples)
+        if self._owner is not None:
+            self.subgraphs[self._owner].update(triples)
+
+    def _own(self, key):
+        """ Record the triples which follow as contributed by the object with key
+        (if incremental), returning the previous owner """
+        owner = self._owner
+        if self.incremental:
+            self.subgraphs[key] = set()
+            self._owner = key
+        return owner
 
     def add_semantic(self,triple):
         """ Add a semantically meaningful triple """
@@ -234,11 +468,86 @@ class Triples2(CoreRDF):
         Return a list of URIs from any document references which provide them.
         :param instance:
         """
-        node = self._get_entity(instance)
+        self._memo = {}
+        self._owner = None
+        node = self._get_entity(instance, None)
+        self._memo = {}
         return self.external_esdoc_references
 
-    def _get_entity(self, instance):
+    def update_instance(self, document):
+        """
+        Re-export a document which may have changed, replacing only its own triples (and those
+        of any documents within it which have also changed). Documents whose content hash is
+        unchanged since they were last updated are skipped. Semantic triples are not replaced.
+        Return True if the document was exported.
+        """
+        if not self.incremental:
+            raise ValueError('Triples2 must be incremental to update documents')
+        if not document._osl.is_document:
+            raise ValueError(f'Not-a-Document: Cannot update {document}')
+        key = self._resource_key(document)
+        try:
+            if self.hashes.get(key) == self._digest(document):
+                return False
+            self.remove_document(key)
+            self._refresh = True
+            self.add_instance(document)
+        finally:
+            self._refresh = False
+            self._digests, self._encodings, self._renewed = {}, {}, set()
+        return True
+
+    def remove_document(self, key):
+        """ Remove the triples contributed by the document (or external entity) with key
+        (as in the objects table), and any external entities no longer referred to.
+        References to it from other documents are kept."""
+        self._drop(key)
+        for external in self.references.pop(key, ()):
+            referrers = self.referrers.get(external)
+            if referrers is not None:
+                referrers.discard(key)
+                if not referrers:
+                    del self.referrers[external]
+                    self.remove_document(external)
+
+    def _drop(self, key):
+        """ Remove the triples contributed by key, and forget it """
+        for triple in self.subgraphs.pop(key, ()):
+            self.g.remove(triple)
+        self.objects.pop(key, None)
+        self.hashes.pop(key, None)
+
+    def _refer(self, key):
+        """ Record that the current owner refers to the external entity with key """
+        if self.incremental and self._owner is not None:
+            self.references.setdefault(self._owner, set()).add(key)
+            self.referrers.setdefault(key, set()).add(self._owner)
+
+    def _digest(self, document):
+        """ The content hash of a document, computed once per update (and from one
+        encoding of the document being updated, shared by the documents within it)"""
+        key = id(document)
+        if key not in self._digests:
+            content, bundle = _encode(document, False, None, self._encodings, {})
+            self._digests[key] = content_hash(content)
+        return self._digests[key]
+
+    def _resource_key(self, document):
+        """ The objects table key of a document """
+        for key in ('id', 'uid'):
+            val = _getval_if_exists_and_set(document._meta, key)
+            if val:
+                return self.resource_space+val
+        # A document which has no uid, bad, bad behaviour
+        raise ValueError(f"RDF Encoding problem\n[[{document}]]\n[[Malformed document has no ID]]")
+
+    def _blank(self, path):
+        """ A blank node for path """
+        return BNode(f'N{self._blank_id(path).hex}')
+
+    def _get_entity(self, instance, path):
         """
+        :param path: the path of the instance from the nearest named node
 
         :return: entity: a suitable object for an RDFlib triple
         :return: references: a list of URIS for esdoc entities which are linked to this instance.
@@ -253,46 +562,52 @@ class Triples2(CoreRDF):
 
         # Setup Node
         klass = instance.__class__.__name__
-        q_klass = URIRef(self.type_space + klass)
+        if id(instance) in self._memo:
+            # shared within this instance, or a cyclic reference back to it
+            diagnose('shared', klass)
+            return self._memo[id(instance)]
+        q_klass = self.tables.klass(klass)
         noderef = None
+        owner = self._owner
         # All documents are resources
         if instance._osl.is_document:
-            for key in ('id', 'uid'):
-                val = _getval_if_exists_and_set(instance._meta, key)
-                if val:
-                    # have we seen it before?
-                    object_key = self.resource_space+val
-                    if object_key in self.objects:
-                        return self.objects[object_key][1]
-                    else:
-                        node = URIRef(object_key)
-                        self.objects[object_key] = [instance, node]
-                        if self.go_semantic:
-                            noderef = get_reference_for(instance)
-                            self.semantic_nodes['shared.doc_reference'].append(str(noderef))
-                    self.add_triple((node, RDF.type, q_klass))
-                    break
-            if not val:
-                # A document which has no uid, bad, bad behaviour
-                raise ValueError(f"RDF Encoding problem\n[[{instance}]]\n[[Malformed document has no ID]]")
+            object_key = self._resource_key(instance)
+            digest = self._digest(instance) if self._refresh else None
+            # have we seen it before? (if updating, replace it if it has changed)
+            if object_key in self.objects:
+                if digest is None or self.hashes.get(object_key) == digest:
+                    return self.objects[object_key][1]
+                self.remove_document(object_key)
+            node = URIRef(object_key)
+            self.objects[object_key] = [instance, node]
+            if digest:
+                self.hashes[object_key] = digest
+            if self.go_semantic:
+                noderef = get_reference_for(instance)
+                self.semantic_nodes['shared.doc_reference'].append(str(noderef))
+            owner = self._own(object_key)
+            self.add_triple((node, RDF.type, q_klass))
         elif klass in ['shared.doc_reference', 'shared.online_resource']:
             already_seen, node = self._check_add_external(instance)
+            self._refer(str(node))
             if already_seen:
                 return node
             else:
+                owner = self._own(str(node))
                 self.add_triple((node, RDF.type, q_klass))
                 noderef = instance
         else:
             # pyosl literal of some sort
-            node = BNode()
+            node = self._blank(path or self._root_path(instance))
             self.add_triple((node, RDF.type, q_klass))
+        self._memo[id(instance)] = node
 
         for key, val in instance.__dict__.items():
             # Escape private/magic properties, except for the osl private metadata which we do want to encode
             if not _is_encodable_attribute(key) or (self.skip_meta and key == '_meta'):
                 continue
 
-            rdfkey = URIRef(self.type_space + klass + '/' + key)
+            rdfkey = self.tables.predicate(klass, key)
 
             # Process iterables / non-iterables differently.
             # Unlike generic serialisation, we only have lists as iterables, let's use that knowledge
@@ -301,7 +616,7 @@ class Triples2(CoreRDF):
                 val = val.value
 
             if not isinstance(val, list): # captures PropertyList too
-                entity = self._value(val)
+                entity = self._value(val, f'{node}/{key}')
                 if entity:
                     self.add_triple((node, rdfkey, entity))
                     if noderef and self.go_semantic:
@@ -310,29 +625,43 @@ class Triples2(CoreRDF):
             # Encode list items
             else:
                 if len(val) > 0:
-                    if DEBUG:
-                        print('List Item ',rdfkey)
-                    bag = BNode()
-                    self.add_triple((node, rdfkey, bag))
-                    for v in val[0:1]:
-                        self.add_triple((bag, RDF.first, self._value(v)))
-                    for v in val[1:]:
-                        self.add_triple((bag, RDF.rest, self._value(v)))
+                    diagnose('rdf list', klass, 'List Item %s', rdfkey)
+                    self.add_triples(self._list(node, rdfkey, key, val))
                     if noderef and self.go_semantic:
                         for v in val:
                             self.add_semantic((instance, key, v))
 
+        self._owner = owner
         return node
 
-    def _value(self, entity):
-        """ Return an RDF encode-able value for an instance"""
+    def _list(self, node, rdfkey, key, val):
+        """ Return the triples linking node to the encoded list val, as an rdf:List
+        (a chain of first/rest cells ending in rdf:nil) or an rdf:Seq (with rdf:_1 ...)"""
+        path = f'{node}/{key}'
+        head = self._blank(path)
+        triples = [(node, rdfkey, head)]
+        values = [self._value(v, f'{path}/{n}') for n, v in enumerate(val)]
+        if self.lists == 'seq':
+            triples.append((head, RDF.type, RDF.Seq))
+            triples.extend((head, _member(n), v) for n, v in enumerate(values, 1))
+        else:
+            cell = head
+            for n, v in enumerate(values, 1):
+                rest = self._blank(f'{path}#{n}') if n < len(values) else RDF.nil
+                triples.append((cell, RDF.first, v))
+                triples.append((cell, RDF.rest, rest))
+                cell = rest
+        return triples
+
+    def _value(self, entity, path=None):
+        """ Return an RDF encode-able value for an instance (at path)"""
         if isinstance(entity, Property):
-            return self._value(entity.value)
+            return self._value(entity.value, path)
         elif hasattr(entity, '_osl'):
             if self.skip_meta and entity.__class__.__name__=='_meta':
                 return entity
             else:
-                return self._get_entity(entity)
+                return self._get_entity(entity, path)
         else:
             if entity:
                 return Literal(entity)
@@ -343,5 +672,105 @@ class Triples2(CoreRDF):
         return self.g.serialize(format='turtle')
 
 
+_MEMBERS = []
 
 
+def _member(n):
+    """ The rdf:_n container membership property """
+    while len(_MEMBERS) < n:
+        _MEMBERS.append(RDF[f'_{len(_MEMBERS) + 1}'])
+    return _MEMBERS[n - 1]
+
+
+# (Literal.n3 writes strings with new lines as long """ strings, which N-Triples doesn't have)
+_NT_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'})
+
+
+def _nt_term(term):
+    """ The N-Triples form of an rdflib term (which is also valid Turtle) """
+    if isinstance(term, Literal):
+        literal = f'"{str(term).translate(_NT_ESCAPES)}"'
+        if term.language:
+            return f'{literal}@{term.language}'
+        if term.datatype:
+            return f'{literal}^^{term.datatype.n3()}'
+        return literal
+    return term.n3()
+
+
+class StreamingTriples(Triples2):
+    """ RDF triples, as Triples2 would produce them, written straight to a file as they are
+    produced rather than held in an rdflib graph. Written as N-Triples, or as Turtle (with
+    the triples for each subject grouped together, as far as they arrive together).
+    Duplicate triples are removed within a window of the most recently written triples,
+    documents and external resources are only ever written once (via the objects table)."""
+
+    FORMATS = ('nt', 'turtle')
+
+    def __init__(self, destination, format='nt', window=10000, collect_semantic_triples=False, skip_meta=True,
+                 deterministic=False, lists='list'):
+        """
+        :param destination: a filename, or an open text file
+        :param format: one of 'nt' or 'turtle'
+        :param window: the number of recent triples checked for duplicates
+        :param deterministic: name blank nodes deterministically (see CoreRDF)
+        :param lists: the list encoding (see Triples2)
+        """
+        super().__init__(collect_semantic_triples, skip_meta, deterministic, lists=lists)
+        if format not in self.FORMATS:
+            raise ValueError(f'Unknown RDF streaming format {format}')
+        self.g = None
+        self.format = format
+        self.owns_file = not hasattr(destination, 'write')
+        self.file = open(destination, 'w', encoding='utf-8') if self.owns_file else destination
+        self.window = OrderedDict()
+        self.window_size = window
+        self.subject = None
+        self.written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_triple(self, triple):
+        """ Write the triple, unless it has been written recently """
+        if triple in self.window:
+            self.window.move_to_end(triple)
+            return
+        self.window[triple] = None
+        if len(self.window) > self.window_size:
+            self.window.popitem(last=False)
+        s, p, o = [_nt_term(t) for t in triple]
+        if self.format == 'nt':
+            self.file.write(f'{s} {p} {o} .\n')
+        elif s == self.subject:
+            self.file.write(f' ;\n    {p} {o}')
+        else:
+            if self.subject is not None:
+                self.file.write(' .\n\n')
+            self.file.write(f'{s} {p} {o}')
+            self.subject = s
+        self.written += 1
+
+    def add_triples(self, triples):
+        """ Write a batch of triples """
+        for triple in triples:
+            self.add_triple(triple)
+
+    def close(self):
+        """ Finish (and close, if we opened it) the output file """
+        if self.file is None:
+            return
+        if self.subject is not None:
+            self.file.write(' .\n')
+            self.subject = None
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+        self.file = None
+
+    def __repr__(self):
+        return f'StreamingTriples ({self.format}, {self.written} triples written)'
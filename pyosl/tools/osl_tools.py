@@ -6,10 +6,15 @@ import re
 from pyosl import Factory
 
 
-def make_time(astring, is_offset=False):
+def is_time_string(astring):
+    """ True if astring is of a form which can be used as a date_time value """
     ok1 = re.match(r'^\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}$', astring)
     ok2 = re.match(r'^\d{4}-\d{2}-\d{2}$', astring)
-    if ok1 or ok2:
+    return bool(ok1 or ok2)
+
+
+def make_time(astring, is_offset=False):
+    if is_time_string(astring):
         k = Factory.build('time.date_time')
         k.is_offset = is_offset
         k.value = astring
@@ -0,0 +1,170 @@
+# Validate serialised (osl or esd json) content directly against the ontology,
+# without building instances, reporting all the errors found.
+
+from pyosl import Factory
+from .esd_decoder import translate_type_to_osl_from_esd, de_camel_attribute
+from .osl_encoder import _is_encodable_attribute
+from .osl_schema import ontology_tables, target_klass
+from .osl_tools import is_time_string
+
+# Injected into _meta by the encoders, not necessarily doc_meta_info properties.
+_META_KEYS = ('type', 'source_key')
+
+
+class _Validator:
+    """ Walks serialised content collecting errors """
+
+    def __init__(self, tables, esd=False):
+        self.tables = tables
+        self.esd = esd
+        self.meta_key = {True: 'meta', False: '_meta'}[esd]
+        self.errors = []
+
+    def error(self, path, message):
+        self.errors.append(f'{path or "/"}: {message}')
+
+    def klass_for(self, type_key):
+        """ Return the class for a serialised type key, or None """
+        if self.esd:
+            try:
+                type_key = translate_type_to_osl_from_esd(type_key)
+            except (ValueError, AssertionError):
+                return None
+        return self.tables.klass_for(type_key)
+
+    def type_of(self, content, path):
+        """ Return the class for the type key in content, or None (with an error)"""
+        meta = content.get(self.meta_key)
+        if not isinstance(meta, dict) or not isinstance(meta.get('type'), str):
+            self.error(path, 'No type key')
+            return None
+        klass = self.klass_for(meta['type'])
+        if klass is None:
+            self.error(path, f'Unknown type {meta["type"]}')
+        return klass
+
+    def document(self, content, path='', ignore=()):
+        """ Validate a dictionary describing an instance, returning its class,
+        ignoring any attributes named in ignore"""
+        klass = self.type_of(content, path)
+        if klass is None:
+            return None
+        if klass not in self.tables.properties:
+            self.error(path, f'{klass} is an enumeration, not a class')
+            return None
+        self.attributes(content, klass, path, ignore)
+        if self.tables.is_document[klass]:
+            self.attributes(content[self.meta_key], 'shared.doc_meta_info', f'{path}/{self.meta_key}', _META_KEYS)
+        return klass
+
+    def attributes(self, content, klass, path, ignore=()):
+        """ Validate the attributes of an instance of klass """
+        properties = self.tables.properties[klass]
+        present = set()
+        for name, value in content.items():
+            if name == self.meta_key or name in ignore:
+                continue
+            if self.esd:
+                name = de_camel_attribute(name)
+            if not _is_encodable_attribute(name):
+                continue
+            if name not in properties:
+                self.error(path, f'Unknown property {name} for {klass}')
+                continue
+            present.add(name)
+            target, cardinality = properties[name]
+            if cardinality in ('0.1', '1.1'):
+                if isinstance(value, list):
+                    self.error(path, f'List value for single valued property {name}')
+                else:
+                    self.value(value, target, f'{path}/{name}', klass, name)
+            elif cardinality == '0.0':
+                self.error(path, f'Value for property {name} with cardinality 0.0')
+            else:
+                if not isinstance(value, list):
+                    self.error(path, f'Single value for list property {name}')
+                else:
+                    for i, v in enumerate(value):
+                        self.value(v, target, f'{path}/{name}/{i}', klass, name)
+        for name, (target, cardinality) in properties.items():
+            if cardinality.startswith('1') and name not in present:
+                self.error(path, f'Missing required property {name} of {klass}')
+
+    def value(self, value, target, path, klass, name):
+        """ Validate a single value against a property target """
+        if isinstance(value, dict):
+            if self.nil_reason(value):
+                return
+            ignore = ()
+            if self.esd and klass == 'shared.doc_meta_info':
+                # FIXME: pyesdoc author references use uid rather than id
+                ignore = ('uid',)
+            actual = self.document(value, path, ignore)
+            if actual is None:
+                return
+            wanted = target_klass(target)
+            if wanted not in self.tables.properties:
+                self.error(path, f'{actual} instance found for {target} property {name}')
+            elif target.startswith('linked_to') and actual == 'shared.doc_reference':
+                self.reference(value, wanted, path, klass, name)
+            elif not self.tables.is_a(actual, wanted):
+                self.error(path, f'{actual} is not a {wanted} (property {name})')
+        elif target in self.tables.builtins:
+            if target != 'bool' and not isinstance(value, self.tables.builtins[target]):
+                self.error(path, f'Expected {target}, found {type(value).__name__}')
+        elif self.tables.is_enum(target):
+            if not isinstance(value, str):
+                self.error(path, f'Expected {target} member, found {type(value).__name__}')
+            elif not self.tables.is_open[target] and value not in self.tables.member_ids[target]:
+                self.error(path, f'"{value}" is not a member of {target}')
+        elif self.esd and target == 'time.date_time' and isinstance(value, str):
+            # these will be fixed up on decoding, if they can be
+            if not is_time_string(value):
+                self.error(path, f'Attempt to set date_time with {value}')
+        else:
+            self.error(path, f'Expected {target}, found {type(value).__name__}')
+
+    def nil_reason(self, value):
+        """ True if value is a nil_reason, which is acceptable anywhere """
+        meta = value.get(self.meta_key)
+        if isinstance(meta, dict) and isinstance(meta.get('type'), str):
+            return self.klass_for(meta['type']) == 'shared.nil_reason'
+        return False
+
+    def reference(self, value, wanted, path, klass, name):
+        """ Validate the target type of a doc_reference """
+        reference_type = value.get('type')
+        if not reference_type:
+            if self.esd and klass == 'shared.doc_meta_info':
+                # FIXME: as for esd_decode, pyesdoc should include an author type.
+                return
+            self.error(path, f'Doc_Reference for property {name} does not have a target type')
+            return
+        # as for group_hack, ignore any type hint
+        referenced = self.klass_for(reference_type.split(':')[0])
+        if referenced is None:
+            self.error(path, f'Doc_Reference to unknown type {reference_type}')
+        elif not self.tables.is_a(referenced, wanted):
+            self.error(path, f'Doc_Reference to {referenced} is not a {wanted} (property {name})')
+
+
+def osl_validate(json_dict, ontology=None):
+    """ Validate osl encoded content against the ontology.
+    :param json_dict: osl content, as a dictionary
+    :param ontology: the ontology to use (default Factory.ontology)
+    :returns: a list of errors, each of the form "path: message", empty if valid.
+    """
+    validator = _Validator(ontology_tables(ontology or Factory.ontology))
+    validator.document(json_dict)
+    return validator.errors
+
+
+def esd_validate(json_dict, ontology=None):
+    """ Validate pyesdoc encoded content against the ontology.
+    :param json_dict: pyesdoc content, as a dictionary
+    :param ontology: the ontology to use (default Factory.ontology)
+    :returns: a list of errors, each of the form "path: message", empty if valid.
+    """
+    validator = _Validator(ontology_tables(ontology or Factory.ontology), esd=True)
+    validator.document(json_dict)
+    return validator.errors
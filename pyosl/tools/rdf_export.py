@@ -0,0 +1,126 @@
+# Export corpora of documents to N-Triples in parallel: documents are shared out between
+# worker processes, each of which writes a partial N-Triples file, and the parts are
+# then merged, removing the duplicate descriptions of documents and external entities
+# which more than one worker has met.
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import shutil
+import tempfile
+
+from pyosl import Factory
+from .osl_corpus import CorpusReader
+from .osl_decoder import osl_decode
+from .osl_encoder import osl_encode
+from .osl_to_rdf import StreamingTriples
+
+
+def _export_part(task):
+    """ Worker: export one share of the documents to a partial N-Triples file, and return
+    the filename and the nodes of the entities described (from the objects table)."""
+    filename, corpus, documents = task
+    if corpus:
+        with CorpusReader(corpus) as reader:
+            documents = [reader.get(uid) for uid in documents]
+    # deterministic, so that blank nodes exported by different workers are named the same
+    with StreamingTriples(filename, 'nt', collect_semantic_triples=False, deterministic=True) as stream:
+        for content in documents:
+            stream.add_instance(osl_decode(Factory, content))
+    return filename, [str(node) for entity, node in stream.objects.values()]
+
+
+def _subject(line):
+    """ The subject of an N-Triples line """
+    return line[:line.find(' ')]
+
+
+def _blank_object(line):
+    """ The object of an N-Triples line if it is a blank node, otherwise None """
+    term = line.rstrip()[:-1].rstrip().rsplit(' ', 1)[-1]
+    return term if term.startswith('_:') else None
+
+
+def _reached(starts, children):
+    """ The blank nodes reachable from starts, given the blank node children of each blank node """
+    reached, todo = set(), list(starts)
+    while todo:
+        node = todo.pop()
+        if node not in reached:
+            reached.add(node)
+            todo += children.get(node, ())
+    return reached
+
+
+def export_corpus(documents, destination, workers=None, chunk_size=None):
+    """ Export documents as N-Triples (the triples StreamingTriples would write for them, with
+    deterministic blank nodes), sharing the work between worker processes.
+    :param documents: a list of documents (instances or osl encoded), or a corpus filename
+    :param destination: the N-Triples file to write
+    :param workers: the number of worker processes (default, one per core)
+    :param chunk_size: the number of documents given to a worker at a time
+        (default, enough for four chunks per worker)
+    :returns: a dictionary with the number of documents and triples written, and the set of
+        entities (documents, references and online resources) described
+    """
+    workers = workers or os.cpu_count()
+    corpus = None
+    if isinstance(documents, str):
+        corpus = documents
+        with CorpusReader(corpus) as reader:
+            documents = list(reader.index)
+    else:
+        # instances can't be sent to other processes, but their encodings can
+        documents = [osl_encode(d)[0] if hasattr(d, '_osl') else d for d in documents]
+    chunk_size = chunk_size or max(1, -(-len(documents) // (4 * workers)))
+
+    directory = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(destination)))
+    try:
+        tasks = [(os.path.join(directory, f'part{n}.nt'), corpus, documents[i:i + chunk_size])
+                 for n, i in enumerate(range(0, len(documents), chunk_size))]
+        if workers == 1:
+            parts = [_export_part(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                parts = list(executor.map(_export_part, tasks))
+        entities, triples = _merge(parts, destination)
+    finally:
+        shutil.rmtree(directory)
+    return {'documents': len(documents), 'triples': triples, 'entities': entities}
+
+
+def _merge(parts, destination):
+    """ Concatenate partial N-Triples files, keeping the description of each entity from the
+    first part which describes it. Blank node ids are deterministic paths from the entity
+    they belong to, so only the blank nodes under an entity which is skipped need to go too:
+    each part is read twice, once to find those, and once to write the rest."""
+    written = set()
+    triples = 0
+    with open(destination, 'w', encoding='utf-8') as output:
+        for filename, entities in parts:
+            new = {f'<{e}>' for e in entities} - written
+            skipped, kept, children = [], [], {}
+            with open(filename, encoding='utf-8') as part:
+                for line in part:
+                    subject, blank = _subject(line), _blank_object(line)
+                    if blank is None:
+                        continue
+                    if subject.startswith('_:'):
+                        children.setdefault(subject, []).append(blank)
+                    elif subject in written and subject not in new:
+                        skipped.append(blank)
+                    else:
+                        kept.append(blank)
+            # (a blank node also reached from a description being kept stays)
+            dropped = _reached(skipped, children) - _reached(kept, children)
+            with open(filename, encoding='utf-8') as part:
+                for line in part:
+                    subject = _subject(line)
+                    if subject.startswith('_:'):
+                        if subject in dropped:
+                            continue
+                    elif subject in written and subject not in new:
+                        continue
+                    output.write(line)
+                    triples += 1
+            written |= new
+    return {e[1:-1] for e in written}, triples
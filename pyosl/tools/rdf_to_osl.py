@@ -0,0 +1,171 @@
+# Rebuild pyosl instances from the RDF written by the exporters in osl_to_rdf,
+# either the plain string triples of Triples (and SQLiteTriples), or the rdflib
+# triples of Triples2 (and StreamingTriples, once written to N-Triples or Turtle).
+
+from rdflib import Graph, Literal, RDF, URIRef
+from rdflib.term import Identifier
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+
+from pyosl.diagnostics import diagnose
+from .osl_to_rdf import MAPPING
+
+TYPE_SPACE = 'https://es-doc.org/types/'
+RESOURCE_SPACE = 'https://es-doc.org/resources/'
+
+# The prefix of the rdf:_n container membership properties
+_MEMBER = str(RDF) + '_'
+
+# How to read the typed literals written by CoreRDF
+_LITERALS = {MAPPING[str]: str,
+             MAPPING[bool]: lambda v: v == 'True',
+             MAPPING[int]: int,
+             MAPPING[float]: float}
+
+
+class _Sink:
+    """ Collects triples from the rdflib N-Triples parser """
+
+    def __init__(self, decoder):
+        self.decoder = decoder
+
+    def triple(self, s, p, o):
+        self.decoder.add_triple((s, p, o))
+
+
+class RDFDecoder:
+    """ Indexes triples by subject, in one pass, and decodes pyosl instances from them on demand.
+    Instances are decoded once, so shared (and cyclic) content is shared in the result."""
+
+    def __init__(self, factory, source=None, format=None, type_space=TYPE_SPACE, resource_space=RESOURCE_SPACE):
+        """
+        :param factory: the Factory used to build instances
+        :param source: optional triples to add (see add)
+        :param format: the format of the source, if it is a file
+        :param type_space: the type namespace used by Triples2
+        :param resource_space: the resource namespace used by Triples2
+        """
+        self.factory = factory
+        self.type_space = type_space
+        self.resource_space = resource_space
+        self.index = {}
+        self.memo = {}
+        if source is not None:
+            self.add(source, format)
+
+    def add_triple(self, triple):
+        s, p, o = triple
+        self.index.setdefault(s, []).append((p, o))
+
+    def add(self, source, format=None):
+        """ Add triples from a CoreRDF exporter (Triples, Triples2, SQLiteTriples), any iterable
+        of triples, or a file (N-Triples are streamed, other formats are parsed by rdflib)."""
+        if isinstance(source, str):
+            format = format or ('nt' if source.endswith('.nt') else 'turtle')
+            if format == 'nt':
+                with open(source, 'rb') as f:
+                    W3CNTriplesParser(sink=_Sink(self)).parse(f)
+                return
+            source = Graph().parse(source, format=format)
+        elif hasattr(source, 'triples') and not callable(source.triples):
+            source = source.triples
+        elif hasattr(source, 'g'):
+            source = source.g
+        for triple in source:
+            self.add_triple(triple)
+
+    def klass(self, subject):
+        """ The package.klass of subject, None if it is not an instance """
+        for p, o in self.index.get(subject, ()):
+            if p == 'rdf:type' and o not in ('rdf:Bag', 'rdf:Seq'):
+                return o
+            if p == RDF.type and o.startswith(self.type_space):
+                return o[len(self.type_space):]
+        return None
+
+    def documents(self):
+        """ The subjects which are documents """
+        klasses = self.factory.ontology.klasses
+        documents = []
+        for subject in self.index:
+            klass = self.klass(subject)
+            if klass in klasses and klasses[klass]._osl.is_document:
+                documents.append(subject)
+        return documents
+
+    def decode(self, subject):
+        """ Return the instance for subject (a node, or the string form of a URI)"""
+        if subject in self.memo:
+            return self.memo[subject]
+        if subject not in self.index and not isinstance(subject, Identifier):
+            # (rdflib terms do not hash as the strings they are)
+            subject = URIRef(subject)
+            if subject in self.memo:
+                return self.memo[subject]
+        klass = self.klass(subject)
+        if klass is None:
+            raise KeyError(f'No instance {subject} in triples')
+        instance = self.factory.build(klass)
+        self.memo[subject] = instance
+
+        values = {}
+        for p, o in self.index[subject]:
+            if p in ('rdf:type', 'rdf:parseType', RDF.type):
+                continue
+            key = p.rsplit('/', 1)[1] if p.startswith(self.type_space) else str(p)
+            values.setdefault(key, []).append(self.__value(o, subject, key))
+        for key, value in values.items():
+            if len(value) > 1:
+                # Triples names instances by name, so distinct instances can share a node
+                diagnose('rdf ambiguous', klass, 'Multiple values for %s of %s, using the first', key, subject)
+            setattr(instance, key, value[0])
+
+        if instance._osl.is_document and isinstance(subject, str) and subject.startswith(self.resource_space):
+            # Triples2 leaves out the document metadata, but the uid is in the resource name
+            if not instance._meta.uid:
+                instance._meta.uid = subject[len(self.resource_space):]
+        return instance
+
+    def __value(self, o, subject, key):
+        """ Decode an object (the value of key for subject) """
+        if isinstance(o, Literal):
+            return o.toPython()
+        if o in self.index:
+            items = self.__list(o, subject, key)
+            if items is not None:
+                return items
+            return self.decode(o)
+        if isinstance(o, str) and '^^' in o:
+            value, datatype = o.rsplit('^^', 1)
+            if datatype in _LITERALS:
+                return _LITERALS[datatype](value)
+        return o
+
+    def __list(self, node, subject, key):
+        """ Return the decoded members if node (the value of key for subject) is a list,
+        otherwise None. Raises a ValueError for an rdf:List which is broken or cyclic. """
+        properties = self.index[node]
+        if ('rdf:type', 'rdf:Seq') in properties:
+            members = sorted((int(p[5:]), o) for p, o in properties if p.startswith('rdf:_'))
+            return [self.__value(o, subject, key) for n, o in members]
+        if (RDF.type, RDF.Seq) in properties:
+            members = sorted((int(p[len(_MEMBER):]), o) for p, o in properties if p.startswith(_MEMBER))
+            return [self.__value(o, subject, key) for n, o in members]
+        if any(p == RDF.first for p, o in properties):
+            items, seen = [], set()
+            while node != RDF.nil:
+                if node in seen:
+                    raise ValueError(f'The list for {key} of {subject} loops back to {node}')
+                seen.add(node)
+                cell = dict(self.index.get(node, ()))
+                if RDF.first not in cell or RDF.rest not in cell:
+                    raise ValueError(f'The list for {key} of {subject} is broken at {node}')
+                items.append(self.__value(cell[RDF.first], subject, key))
+                node = cell[RDF.rest]
+            return items
+        return None
+
+
+def rdf_decode(factory, source, format=None):
+    """ Decode all the documents in the triples from source (see RDFDecoder.add) """
+    decoder = RDFDecoder(factory, source, format)
+    return [decoder.decode(s) for s in decoder.documents()]
@@ -21,9 +21,10 @@ from .uml_base import UmlBase
 
 from .uml_packages import package_label, PackageUML
 
-from .uml_diagrams import BasicUML
+from .uml_diagrams import BasicUML, AssociationGraph, association_graph
 
 from .triples_to_dot import TriplesDelux
 
 from .uml4_packages import (uml4_software, uml4_shared, uml4_science, uml4_platform, uml4_activity,
-                            uml4_cmip, uml4_data, uml4_design, uml4_drs, uml4_iso, uml4_time)
+                            uml4_cmip, uml4_data, uml4_design, uml4_drs, uml4_iso, uml4_time,
+                            DIAGRAMS, build_diagrams)
@@ -1,5 +1,6 @@
 from pyosl.tools import Triples
 from pyosl.tools import NAMESPACE
+from pyosl.diagnostics import diagnose
 import pygraphviz as pgv
 import uuid
 
@@ -54,7 +55,7 @@ class TriplesDelux(Triples):
         for a, b, c in self.triples:
             an = self.__getnode(a)
             cn = self.__getnode(c, b)
-            print(f'Adding {a}({an}) {b} {c}({cn})')
+            diagnose('dot triple', b, 'Adding %s(%s) %s %s(%s)', a, an, b, c, cn)
             if b == 'rdf:parseType' and c == 'resource':
                 an.attr['shape'] = 'rectangle'
             try:
@@ -1,3 +1,8 @@
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import time
+import traceback
 
 from pyosl.uml import BasicUML
 
@@ -112,3 +117,90 @@ def uml4_time():
     d.set_visible_package('time', restrict=True)
     d.set_association_edges(multiline=True)
     d.generate_pdf()
+
+
+DIAGRAMS = {
+    'activity': uml4_activity,
+    'data': uml4_data,
+    'designing': uml4_design,
+    'shared': uml4_shared,
+    'iso': uml4_iso,
+    'drs': uml4_drs,
+    'platform': uml4_platform,
+    'science': uml4_science,
+    'software': uml4_software,
+    'cmip': uml4_cmip,
+    'time': uml4_time,
+}
+
+
+def _uml_ontology():
+    """ Worker initialiser: make sure the UML ontology is registered (see above) """
+    from pyosl import Factory, Ontology
+    from pyosl.uml import UmlBase
+    if Factory.ontology.BaseClass is not UmlBase:
+        Factory.register(Ontology(UmlBase))
+
+
+def _build_diagram(package):
+    """ Build the diagram for one package, returning the time taken and any error """
+    start = time.perf_counter()
+    try:
+        if package not in DIAGRAMS:
+            raise KeyError(f'No UML diagram for package {package}')
+        DIAGRAMS[package]()
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return {'seconds': time.perf_counter() - start, 'error': error}
+
+
+def _run_diagram(package, connection):
+    """ Worker process: build the diagram for one package, and send back the result """
+    _uml_ontology()
+    connection.send(_build_diagram(package))
+    connection.close()
+
+
+def build_diagrams(packages=None, workers=None):
+    """
+    Build package diagrams in parallel, each in a process of its own (so the dot layouts
+    run concurrently, and a diagram which fails, or even kills its process, doesn't stop
+    the others).
+    :param packages: the packages to draw (default, all of those in DIAGRAMS)
+    :param workers: the number of diagrams built at once (default, one per core)
+    :return: a dictionary keyed by package of {'seconds': time taken, 'error': None, or the traceback}
+    """
+    packages = list(dict.fromkeys(DIAGRAMS if packages is None else packages))
+    workers = workers or os.cpu_count()
+    pending, running, results = list(packages), {}, {}
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                package = pending.pop(0)
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=_run_diagram, args=(package, sender))
+                process.start()
+                sender.close()
+                running[receiver] = (package, process, time.perf_counter())
+            # (a connection is also ready when its process dies)
+            for receiver in wait(list(running)):
+                package, process, start = running.pop(receiver)
+                try:
+                    results[package] = receiver.recv()
+                except EOFError:
+                    process.join()
+                    results[package] = {'seconds': time.perf_counter() - start,
+                                        'error': f'Worker for {package} died (exit code {process.exitcode})'}
+                except Exception:
+                    results[package] = {'seconds': time.perf_counter() - start,
+                                        'error': traceback.format_exc()}
+                receiver.close()
+                process.join()
+    finally:
+        # (only left running if we were interrupted)
+        for receiver, (package, process, start) in running.items():
+            process.terminate()
+            process.join()
+            receiver.close()
+    return {p: results[p] for p in packages}
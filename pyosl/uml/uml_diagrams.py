@@ -1,12 +1,62 @@
 import math
 import pygraphviz as pgv
-from copy import copy
 from datetime import datetime
 
 from .uml_utils import PackageColour
 from .uml_base  import UmlBase
 
 from ..factory import Factory
+from ..anacronisms import group_hack
+
+
+def _target(p):
+    """ The class which is the target of a property (without any linked_to or type hint)"""
+    target = p[1]
+    if target.startswith('linked_to'):
+        target = target[10:-1]
+    return group_hack(target)
+
+
+class AssociationGraph:
+
+    """ The class level associations in an ontology: for each class, the (non builtin) classes
+    which are the targets of its own properties, and its base class. Built once from the class
+    metadata, so that diagrams can be expanded without building instances."""
+
+    def __init__(self, ontology):
+
+        self.targets = {}
+        self.bases = {}
+
+        for k, klass in ontology.klasses.items():
+            meta = klass._osl
+            targets = {}
+            for p in getattr(meta, 'properties', []):
+                target = _target(p)
+                if target not in ontology.builtins:
+                    targets[target] = True
+            self.targets[k] = list(targets)
+            self.bases[k] = getattr(meta, 'base', None)
+
+    def associated(self, klass, associations=True, bases=True):
+        """ For a given class, return the associated classes, possibly including its
+        base class (but not all the hierarchy), in order and without duplicates """
+        extras = list(self.targets.get(klass, [])) if associations else []
+        base = self.bases.get(klass) if bases else None
+        if base and base not in extras:
+            extras.append(base)
+        return extras
+
+
+_GRAPHS = {}
+
+
+def association_graph(ontology):
+    """ Return the (cached) association graph for an ontology """
+    key = id(ontology)
+    if key not in _GRAPHS or _GRAPHS[key][0] is not ontology:
+        _GRAPHS[key] = (ontology, AssociationGraph(ontology))
+    return _GRAPHS[key][1]
 
 
 class BasicUML:
@@ -92,26 +142,25 @@ class BasicUML:
         for c in classes2view:
             if c not in omit_classes:
                 self.classes2view[c] = Factory.build(c)
-        self.allup = copy(self.classes2view)
 
         # find all the extra ones that are in the properties of the ones we
-        # asked for
+        # asked for (from the class metadata, so only visible classes are built)
+        visible = dict.fromkeys(self.classes2view)
         if expand_associated or expand_base:
+            graph = association_graph(Factory.ontology)
             for c in self.classes2view:
-                associated = self.__find_associated_classes(self.classes2view[c],
-                                                            associations=expand_associated,
-                                                            bases=expand_base)
-                for k, v in associated.items():
-                    if k not in self.allup and k not in Factory.ontology.builtins:
-                        self.allup[k] = v
+                for k in graph.associated(c, associations=expand_associated, bases=expand_base):
+                    visible.setdefault(k)
 
         # Now remove anything we don't want to see
         for c in omit_classes:
-            if c in self.allup:
-                del self.allup[c]
+            if c in visible:
+                del visible[c]
             else:
                 print('%%Warning - omit_classes list includes one not found - ',c)
 
+        self.allup = {c: self.classes2view[c] if c in self.classes2view else Factory.build(c) for c in visible}
+
         self.__find_class_edges(show_links=show_base_links)
 
     def set_visible_package(self, package, omit_classes=[], extra_classes=[], restrict=False, show_base_links=True):
@@ -146,9 +195,7 @@ class BasicUML:
         """
         hidden_properties = []
         for p in self.allup[c]._osl.properties:
-            target = p[1]
-            if target.startswith('linked_to'):
-                target = target[10:-1]
+            target = _target(p)
             if target in self.allup:
                 if add_edges:
                     self.associations.append(target)
@@ -204,32 +251,6 @@ class BasicUML:
         self.generate_dot(dot_out_please)
         self.G.draw('{}.pdf'.format(self.filestem), prog='dot')
 
-    def __find_associated_classes(self, klass, associations=True, bases =True):
-
-        """ For a given class, find all the associated classes,
-        possibly including base classes, but not all hierarchy """
-
-        extras = {}
-
-        if hasattr(klass, '_osl'):
-            meta = klass._osl
-            if associations:
-                if hasattr(meta, 'properties'):
-                    candidates = [p[1] for p in meta.properties]
-                    for candidate in candidates:
-                        if candidate.startswith('linked_to'):
-                            candidate = candidate[10:-1]
-                        if candidate not in extras:
-                            k = Factory.build(candidate)
-                            extras[candidate] = k
-
-            if bases and hasattr(meta, 'base'):
-                if meta.base:
-                    if meta.base not in extras:
-                        extras[meta.base] = Factory.build(meta.base)
-
-        return extras
-
     def __find_class_edges(self, show_links=True):
 
         """Now parse the classes we've got, and if show_links